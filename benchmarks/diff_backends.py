@@ -0,0 +1,38 @@
+import argparse
+import json
+import time
+
+from src.core.repository import Repository, GITPYTHON_BACKEND, GIT_LOG_BACKEND
+
+# Benchmark of the diff backends: reads the same commits with both of them and checks the results are identical.
+# Usage: python -m benchmarks.diff_backends --repo <path> --n <count of commits>
+def run_backend(repo, n: int, backend: str):
+    start = time.perf_counter()
+    commits = repo.get_last_commits(n, backend)
+    elapsed = time.perf_counter() - start
+
+    return commits, {
+        "backend": backend,
+        "seconds": round(elapsed, 4),
+        "commits": len(commits),
+        "diffs": sum(len(c["diffs"]) for c in commits),
+        "commits_per_sec": round(len(commits) / elapsed, 2) if elapsed else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(prog="diff_backends")
+    parser.add_argument("--repo", type=str, required=True, help="Path to a local repository")
+    parser.add_argument("--n", type=int, required=True, help="Number of last commits to read")
+    parsed = parser.parse_args()
+
+    repo = Repository(parsed.repo)
+    gitpython_commits, gitpython_stats = run_backend(repo, parsed.n, GITPYTHON_BACKEND)
+    git_log_commits, git_log_stats = run_backend(repo, parsed.n, GIT_LOG_BACKEND)
+
+    print(json.dumps({
+        "identical": gitpython_commits == git_log_commits,
+        "results": [gitpython_stats, git_log_stats],
+    }, indent=4))
+
+if __name__ == "__main__":
+    main()
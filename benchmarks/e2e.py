@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+import resource
+import time
+
+from src.cli.args import args
+from src.cli.cli import StaticCLI
+from src.core.classifier import FileClassifier
+from src.core.llm.llm import LLM, AsyncLLM
+from src.core.regex import Regex
+from src.core.repository import Repository
+from src.core.scanner import SECRETS_MODE, SENSITIVE_MODE, ALL_MODE
+from src.helpers.profile_helper import Profiler, ProfiledLLM
+from src.main import get_analysis, ASYNC_LLM_ENGINE
+
+# End-to-end run of one scan mode with profiling, meant to be run in its own process so peak RSS is its own.
+# The LLM client is pointed at the fake server by GROQ_BASE_URL. Prints metrics as JSON.
+# Usage: python -m benchmarks.e2e --repo <path> --n <count of commits> --mode secrets|sensitive|all --out <report path>
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(max(own, children) / 1024, 1)
+
+def run_e2e(repo_path: str, n: int, mode: str, out: str, **overrides) -> dict:
+    cli = StaticCLI(
+        args,
+        repo=repo_path,
+        n=n,
+        out=out,
+        mode=mode,
+        no_llm_cache=True,
+        no_detection_cache=True,
+        **overrides,
+    )
+
+    start = time.perf_counter()
+    repo = Repository(repo_path)
+    regex = Regex()
+    regex.profiler = Profiler()
+
+    llm_class = AsyncLLM if cli.get_arg("llm_engine") == ASYNC_LLM_ENGINE else LLM
+    llm = ProfiledLLM(llm_class(os.getenv("API_TOKEN", "bench"), os.getenv("LLM_MODEL", "bench")), regex.profiler)
+
+    results, metadata = get_analysis(mode)(repo, cli, regex, llm, classifier=FileClassifier())
+    seconds = time.perf_counter() - start
+
+    report = regex.profiler.report(top_rules=5)
+    counters = report["counters"]
+    llm_items = metadata.get("llm", {}).get("items", 0)
+    llm_seconds = report["stages"].get("llm", 0.0)
+
+    return {
+        "mode": mode,
+        "seconds": round(seconds, 4),
+        "commits": counters.get("commits", 0),
+        "lines": counters.get("lines", 0),
+        "candidates": counters.get("candidates", 0),
+        "findings": len(results),
+        "commits_per_sec": round(counters.get("commits", 0) / seconds, 2),
+        "lines_per_sec": round(counters.get("lines", 0) / seconds, 2),
+        "llm_items": llm_items,
+        "llm_items_per_sec": round(llm_items / llm_seconds, 2) if llm_seconds else None,
+        "llm_latency": report["llm_latency"],
+        "stages": report["stages"],
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(prog="e2e")
+    parser.add_argument("--repo", type=str, required=True, help="Path to a local repository")
+    parser.add_argument("--n", type=int, required=True, help="Number of last commits to scan")
+    parser.add_argument("--mode", type=str, choices=[SECRETS_MODE, SENSITIVE_MODE, ALL_MODE], default=SECRETS_MODE, help="Scan mode")
+    parser.add_argument("--out", type=str, required=True, help="Path to the report")
+    parser.add_argument("--workers", type=int, default=1, help="Number of processes of the heuristic stage")
+    parser.add_argument("--engine", type=str, default="line", help="Matching engine")
+    parser.add_argument("--llm-engine", type=str, default="threads", help="LLM engine")
+    parsed = parser.parse_args()
+
+    print(json.dumps(run_e2e(
+        parsed.repo,
+        parsed.n,
+        parsed.mode,
+        parsed.out,
+        workers=parsed.workers,
+        engine=parsed.engine,
+        llm_engine=parsed.llm_engine,
+    )))
+
+if __name__ == "__main__":
+    main()
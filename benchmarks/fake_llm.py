@@ -0,0 +1,113 @@
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Local chat-completions server which stands in for the LLM in the benchmarks. Every item of the prompt
+# gets a verdict, "positive_ratio" of them are positive. Point the client at it with GROQ_BASE_URL.
+# Usage: python -m benchmarks.fake_llm --port <port> [--latency <seconds per request>]
+
+_ITEM_ID_REGEX = re.compile(r"(?m)^id=(\d+)")
+
+class FakeLLMServer:
+    def __init__(self, port: int = 0, latency: float = 0.0, positive_ratio: float = 0.5):
+        self.latency = latency
+        self.positive_ratio = positive_ratio
+        self.requests = 0
+        self.items = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                out = json.dumps(server.complete(body)).encode("utf-8")
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    # Verdicts depend only on the item id, so repeated runs get the same answers
+    def label(self, _id: int, sensitive: bool) -> str:
+        positive = (_id * 7919) % 100 < self.positive_ratio * 100
+        if sensitive:
+            return "sensitive" if positive else "not_sensitive"
+        return "secret" if positive else "not_secret"
+
+    def complete(self, body) -> dict:
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+        prompt = body["messages"][0]["content"]
+        sensitive = "Sensitive" in json.dumps(body.get("response_format"))
+        ids = [int(_id) for _id in _ITEM_ID_REGEX.findall(prompt)]
+
+        with self._lock:
+            self.requests += 1
+            self.items += len(ids)
+
+        content = json.dumps({
+            "items": [{"id": _id, "label": self.label(_id, sensitive), "reason": "benchmark"} for _id in ids]
+        })
+
+        return {
+            "id": f"bench-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "bench"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content},
+            }],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4, "total_tokens": 0},
+        }
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "items": self.items}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(prog="fake_llm")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds every request takes")
+    parser.add_argument("--positive-ratio", type=float, default=0.5, help="Share of items labeled as secret/sensitive")
+    parsed = parser.parse_args()
+
+    server = FakeLLMServer(parsed.port, parsed.latency, parsed.positive_ratio)
+    print(f"Fake LLM is listening on {server.url}")
+    server.httpd.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import time
+
+from src.core.regex import Regex
+from src.core.repository import iter_added_lines
+from src.helpers.math_helper import shannon_entropy
+from src.helpers.regex_helper import compression_ratio
+
+# Tokens shorter than this are not worth measuring entropy of
+MIN_TOKEN_LENGTH = 8
+MAX_TOKENS = 20_000
+
+# Smallest time of the repeated runs of the function
+def best_of(fn, repeat: int = 3) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+def _rate(count: int, seconds: float):
+    return round(count / seconds, 2) if seconds else None
+
+# Micro-benchmarks of the hot functions over the diffs of the commits ([{hash, message, diffs}] with listed diffs)
+def run_micro(commits, repeat: int = 3) -> dict:
+    diffs = [diff for commit in commits for diff in commit["diffs"] if diff["file"] is not None]
+    patch_bytes = sum(len(diff["patch"]) for diff in diffs)
+    lines = [(line, diff["file"]) for diff in diffs for line in iter_added_lines(diff["patch"])]
+
+    tokens = [
+        token
+        for line, _ in lines
+        for token in line[1].split()
+        if len(token) >= MIN_TOKEN_LENGTH
+    ][:MAX_TOKENS]
+
+    def parse():
+        for diff in diffs:
+            for _ in iter_added_lines(diff["patch"]):
+                pass
+
+    # Rule sets are loaded before timing, so only the matching is measured
+    regex = Regex()
+    _ = regex.secrets, regex.sensitive
+
+    def detect(detector):
+        def run():
+            for line, file_name in lines:
+                detector(line, file_name, None)
+        return run
+
+    def entropy():
+        for token in tokens:
+            shannon_entropy(token)
+
+    def compression():
+        for token in tokens:
+            compression_ratio(token)
+
+    parse_seconds = best_of(parse, repeat)
+    secrets_seconds = best_of(detect(regex.detect_secret), repeat)
+    sensitive_seconds = best_of(detect(regex.detect_sensitive), repeat)
+    entropy_seconds = best_of(entropy, repeat)
+    compression_seconds = best_of(compression, repeat)
+
+    return {
+        "iter_added_lines": {
+            "diffs": len(diffs),
+            "lines": len(lines),
+            "seconds": round(parse_seconds, 4),
+            "lines_per_sec": _rate(len(lines), parse_seconds),
+            "mb_per_sec": _rate(patch_bytes / 1e6, parse_seconds),
+        },
+        "detect_secret": {
+            "lines": len(lines),
+            "seconds": round(secrets_seconds, 4),
+            "lines_per_sec": _rate(len(lines), secrets_seconds),
+        },
+        "detect_sensitive": {
+            "lines": len(lines),
+            "seconds": round(sensitive_seconds, 4),
+            "lines_per_sec": _rate(len(lines), sensitive_seconds),
+        },
+        "shannon_entropy": {
+            "calls": len(tokens),
+            "seconds": round(entropy_seconds, 4),
+            "calls_per_sec": _rate(len(tokens), entropy_seconds),
+        },
+        "compression_ratio": {
+            "calls": len(tokens),
+            "seconds": round(compression_seconds, 4),
+            "calls_per_sec": _rate(len(tokens), compression_seconds),
+        },
+    }
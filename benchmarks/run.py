@@ -0,0 +1,187 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.diff_backends import run_backend
+from benchmarks.fake_llm import FakeLLMServer
+from benchmarks.micro import run_micro
+from benchmarks.synthetic_repo import RepoGenerator, default_params
+from src.core.repository import Repository, GITPYTHON_BACKEND, GIT_LOG_BACKEND
+from src.core.scanner import SECRETS_MODE, SENSITIVE_MODE, ALL_MODE
+
+# Benchmark suite: generates a synthetic repository (or uses the given one), runs the micro-benchmarks,
+# both diff backends and end-to-end scans of every mode against the fake LLM, and writes results as JSON.
+# With --baseline the results are compared with a previous run.
+# Usage: python -m benchmarks.run --out <results.json> [--baseline <previous results.json>]
+
+# Bump when the layout of the results changes, results of different versions are not compared
+RESULTS_VERSION = 1
+
+# Metrics compared with the baseline and whether higher is better
+COMPARED_METRICS = {
+    "lines_per_sec": True,
+    "commits_per_sec": True,
+    "calls_per_sec": True,
+    "mb_per_sec": True,
+    "llm_items_per_sec": True,
+    "peak_rss_mb": False,
+}
+
+def get_environment() -> dict:
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "revision": revision,
+    }
+
+# End-to-end scan in a separate process, so its peak RSS and imports don't depend on the suite
+def run_e2e_process(repo_path: str, n: int, mode: str, out_dir: str, server: FakeLLMServer, **options) -> dict:
+    cmd = [
+        sys.executable, "-m", "benchmarks.e2e",
+        "--repo", repo_path,
+        "--n", str(n),
+        "--mode", mode,
+        "--out", os.path.join(out_dir, f"{mode}.json"),
+    ]
+    for name, value in options.items():
+        cmd += [f"--{name.replace('_', '-')}", str(value)]
+
+    env = {**os.environ, "GROQ_BASE_URL": server.url, "API_TOKEN": "bench", "LLM_MODEL": "bench"}
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"End-to-end {mode} run failed:\n{proc.stderr}")
+
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+# Pairs of (path, value) of the compared metrics
+def _iter_metrics(results: dict, prefix: str = ""):
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from _iter_metrics(value, path)
+        elif key in COMPARED_METRICS and isinstance(value, (int, float)):
+            yield path, key, value
+
+# Ratio of current to baseline value of every metric, "speedup" > 1 means current is better
+def compare(results: dict, baseline: dict) -> dict:
+    if baseline.get("version") != results.get("version"):
+        return {"error": f"baseline version {baseline.get('version')} != {results.get('version')}"}
+
+    previous = {path: value for path, _, value in _iter_metrics(baseline)}
+    comparison = {}
+
+    # Numbers of different repositories or commit counts are not comparable, the comparison is still made
+    def setup(data):
+        repo = data.get("repo", {})
+        return repo.get("params", repo.get("path")), data.get("n")
+
+    if setup(baseline) != setup(results):
+        comparison["warning"] = "repository or count of commits differs from the baseline"
+
+    for path, key, value in _iter_metrics(results):
+        old = previous.get(path)
+        if not old or not value:
+            continue
+
+        ratio = value / old if COMPARED_METRICS[key] else old / value
+        comparison[path] = {"baseline": old, "current": value, "speedup": round(ratio, 3)}
+
+    return comparison
+
+def run_suite(parsed) -> dict:
+    with tempfile.TemporaryDirectory(prefix="seeker-bench-") as work_dir:
+        return _run_suite(parsed, work_dir)
+
+def _run_suite(parsed, work_dir: str) -> dict:
+    repo_info = None
+    repo_path = parsed.repo
+    if repo_path is None:
+        repo_path = os.path.join(work_dir, "repo")
+        generator = RepoGenerator(
+            commits=parsed.commits,
+            files_per_commit=parsed.files_per_commit,
+            lines_per_diff=parsed.lines_per_diff,
+            file_types=parsed.file_types.split(","),
+            secret_density=parsed.secret_density,
+            pii_density=parsed.pii_density,
+            seed=parsed.seed,
+        )
+        start = time.perf_counter()
+        repo_info = generator.generate(repo_path)
+        repo_info["seconds"] = round(time.perf_counter() - start, 4)
+
+    n = parsed.n or parsed.commits
+    repo = Repository(repo_path)
+
+    commits, git_log_stats = run_backend(repo, n, GIT_LOG_BACKEND)
+    results = {
+        "version": RESULTS_VERSION,
+        "environment": get_environment(),
+        "repo": repo_info or {"path": os.path.abspath(repo_path)},
+        "n": n,
+        "diff_backends": {
+            GITPYTHON_BACKEND: run_backend(repo, n, GITPYTHON_BACKEND)[1],
+            GIT_LOG_BACKEND: git_log_stats,
+        },
+        "micro": run_micro(commits, parsed.repeat),
+    }
+
+    if not parsed.skip_e2e:
+        options = {"workers": parsed.workers, "engine": parsed.engine, "llm_engine": parsed.llm_engine}
+        with FakeLLMServer(latency=parsed.llm_latency) as server:
+            results["e2e"] = {
+                mode: run_e2e_process(repo_path, n, mode, work_dir, server, **options)
+                for mode in (SECRETS_MODE, SENSITIVE_MODE, ALL_MODE)
+            }
+            results["fake_llm"] = server.stats()
+
+    return results
+
+def main():
+    defaults = default_params()
+    parser = argparse.ArgumentParser(prog="benchmarks")
+    parser.add_argument("--out", type=str, required=True, help="Path to the results (JSON)")
+    parser.add_argument("--baseline", type=str, help="Results of a previous run to compare with")
+    parser.add_argument("--repo", type=str, help="Benchmark an existing local repository instead of a synthetic one")
+    parser.add_argument("--n", type=int, help="Number of last commits to scan, all generated commits by default")
+    parser.add_argument("--commits", type=int, default=defaults["commits"], help="Count of generated commits")
+    parser.add_argument("--files-per-commit", type=int, default=defaults["files_per_commit"], help="Count of files changed by a generated commit")
+    parser.add_argument("--lines-per-diff", type=int, default=defaults["lines_per_diff"], help="Count of added lines per changed file")
+    parser.add_argument("--file-types", type=str, default=",".join(defaults["file_types"]), help="Comma separated extensions of the generated files")
+    parser.add_argument("--secret-density", type=float, default=defaults["secret_density"], help="Share of added lines with a fake secret")
+    parser.add_argument("--pii-density", type=float, default=defaults["pii_density"], help="Share of added lines with fake personal data")
+    parser.add_argument("--seed", type=int, default=defaults["seed"], help="Random seed of the generator")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of every micro-benchmark, the best one is reported")
+    parser.add_argument("--skip-e2e", action="store_true", help="Run only the micro-benchmarks")
+    parser.add_argument("--workers", type=int, default=1, help="Number of processes of the heuristic stage in end-to-end runs")
+    parser.add_argument("--engine", type=str, default="line", help="Matching engine of end-to-end runs")
+    parser.add_argument("--llm-engine", type=str, default="threads", help="LLM engine of end-to-end runs")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds every fake LLM request takes")
+    parsed = parser.parse_args()
+
+    results = run_suite(parsed)
+
+    if parsed.baseline:
+        with open(parsed.baseline, "r", encoding="utf-8") as f:
+            results["comparison"] = compare(results, json.load(f))
+
+    with open(parsed.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+
+    print(json.dumps(results.get("comparison", results), indent=4))
+
+if __name__ == "__main__":
+    main()
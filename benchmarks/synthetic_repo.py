@@ -0,0 +1,208 @@
+import argparse
+import json
+import os
+import random
+import string
+import subprocess
+
+# Generator of synthetic git repositories for the benchmarks. Commits are written with one "git fast-import"
+# process, so even thousands of commits are generated in seconds. Same parameters and seed give the same repository.
+# Usage: python -m benchmarks.synthetic_repo --path <new repository path> --commits <count of commits>
+
+FILE_TYPES = ["py", "js", "yml", "json", "env", "md"]
+
+# Unix time of the first commit, every next commit is a minute later
+START_TIME = 1_700_000_000
+
+_WORDS = [
+    "user", "order", "price", "cache", "client", "server", "config", "value", "result", "index",
+    "payload", "session", "request", "response", "handler", "buffer", "record", "stream", "token", "item",
+]
+
+_FIRST_NAMES = ["john", "maria", "alex", "olga", "peter", "anna", "li", "fatima", "james", "sofia"]
+_LAST_NAMES = ["smith", "garcia", "ivanova", "muller", "chen", "kowalski", "brown", "rossi", "haddad", "silva"]
+_DOMAINS = ["acme-corp.com", "mailbox.org", "northwind.io", "contoso.net", "globex.co.uk"]
+
+def _random_chars(rnd: random.Random, alphabet: str, length: int) -> str:
+    return "".join(rnd.choice(alphabet) for _ in range(length))
+
+def _luhn_number(rnd: random.Random, prefix: str, length: int) -> str:
+    digits = [int(d) for d in prefix] + [rnd.randrange(10) for _ in range(length - len(prefix) - 1)]
+
+    total = 0
+    for idx, digit in enumerate(reversed(digits)):
+        if idx % 2 == 0:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+
+    return "".join(map(str, digits)) + str((10 - total % 10) % 10)
+
+def _iban(rnd: random.Random) -> str:
+    bban = _random_chars(rnd, string.digits, 18)
+    check = 98 - int(bban + "131400") % 97
+    return f"DE{check:02d}{bban}"
+
+# Lines with fake credentials of the formats the secrets rules look for
+def secret_line(rnd: random.Random) -> str:
+    upper_digits = string.ascii_uppercase + string.digits
+    alnum = string.ascii_letters + string.digits
+
+    return rnd.choice([
+        lambda: f'AWS_ACCESS_KEY_ID = "AKIA{_random_chars(rnd, upper_digits, 16)}"',
+        lambda: f'aws_secret_access_key = "{_random_chars(rnd, alnum + "/+", 40)}"',
+        lambda: f'GITHUB_TOKEN = "ghp_{_random_chars(rnd, alnum, 36)}"',
+        lambda: f'SLACK_TOKEN = "xoxb-{_random_chars(rnd, string.digits, 12)}-{_random_chars(rnd, alnum, 24)}"',
+        lambda: f'STRIPE_KEY = "sk_live_{_random_chars(rnd, alnum, 24)}"',
+        lambda: f'db_password = "{_random_chars(rnd, alnum + "!#%", 14)}"',
+    ])()
+
+# Lines with fake personal data of the formats the sensitive rules look for
+def pii_line(rnd: random.Random) -> str:
+    return rnd.choice([
+        lambda: f'contact = "{rnd.choice(_FIRST_NAMES)}.{rnd.choice(_LAST_NAMES)}@{rnd.choice(_DOMAINS)}"',
+        lambda: f'phone = "+1 ({rnd.randint(201, 989)}) {rnd.randint(200, 999)}-{rnd.randint(1000, 9999)}"',
+        lambda: f'card_number = "{_luhn_number(rnd, rnd.choice(["4", "51", "37"]), 16)}"',
+        lambda: f'ssn = "{rnd.randint(100, 665)}-{rnd.randint(10, 99)}-{rnd.randint(1000, 9999)}"',
+        lambda: f'iban = "{_iban(rnd)}"',
+    ])()
+
+# Ordinary line of a file of the type
+def filler_line(rnd: random.Random, file_type: str, idx: int) -> str:
+    word = rnd.choice(_WORDS)
+    other = rnd.choice(_WORDS)
+
+    if file_type == "py":
+        return f"{word}_{idx} = compute_{other}({idx}, '{rnd.choice(_WORDS)}')"
+    if file_type == "js":
+        return f"const {word}{idx} = await {other}.load({idx}, \"{rnd.choice(_WORDS)}\");"
+    if file_type == "yml":
+        return f"{word}_{idx}: {other}-{rnd.randint(0, 9999)}"
+    if file_type == "json":
+        return f"  \"{word}_{idx}\": \"{other}-{rnd.randint(0, 9999)}\","
+    if file_type == "env":
+        return f"{word.upper()}_{idx}={other}_{rnd.randint(0, 9999)}"
+    return f"The {word} of the {other} is described in section {idx}."
+
+# Parameters of a synthetic repository
+def default_params() -> dict:
+    return {
+        "commits": 200,
+        "files_per_commit": 3,
+        "lines_per_diff": 40,
+        "file_types": FILE_TYPES,
+        "secret_density": 0.01,
+        "pii_density": 0.01,
+        "seed": 0,
+    }
+
+class RepoGenerator:
+    def __init__(self, **params):
+        self.params = {**default_params(), **params}
+        self.rnd = random.Random(self.params["seed"])
+        self.files = {}
+        self.injected = {"secrets": 0, "pii": 0}
+
+    def _line(self, file_type: str, idx: int) -> str:
+        roll = self.rnd.random()
+        if roll < self.params["secret_density"]:
+            self.injected["secrets"] += 1
+            return secret_line(self.rnd)
+        if roll < self.params["secret_density"] + self.params["pii_density"]:
+            self.injected["pii"] += 1
+            return pii_line(self.rnd)
+
+        return filler_line(self.rnd, file_type, idx)
+
+    # New file, or an existing one with some lines replaced and new lines appended
+    def _change_file(self, commit_idx: int) -> str:
+        lines_per_diff = self.params["lines_per_diff"]
+
+        if self.files and self.rnd.random() < 0.6:
+            path = self.rnd.choice(sorted(self.files))
+            file_type = path.rsplit(".", 1)[1]
+            lines = self.files[path]
+
+            for _ in range(lines_per_diff // 4):
+                lines[self.rnd.randrange(len(lines))] = self._line(file_type, self.rnd.randrange(10_000))
+
+            start = len(lines)
+            lines.extend(self._line(file_type, start + idx) for idx in range(lines_per_diff - lines_per_diff // 4))
+            return path
+
+        file_type = self.rnd.choice(self.params["file_types"])
+        path = f"{self.rnd.choice(_WORDS)}/{self.rnd.choice(_WORDS)}_{commit_idx}.{file_type}"
+        self.files[path] = [self._line(file_type, idx) for idx in range(lines_per_diff)]
+        return path
+
+    def _data(self, text: str) -> bytes:
+        raw = text.encode("utf-8")
+        return b"data %d\n" % len(raw) + raw + b"\n"
+
+    # Stream of "git fast-import" commands of the whole history
+    def iter_stream(self):
+        for commit_idx in range(self.params["commits"]):
+            changed = {self._change_file(commit_idx) for _ in range(self.params["files_per_commit"])}
+
+            chunks = [
+                b"commit refs/heads/main\n",
+                b"mark :%d\n" % (commit_idx + 1),
+                b"committer Bench <bench@example.com> %d +0000\n" % (START_TIME + commit_idx * 60),
+                self._data(f"Change {commit_idx}: update {', '.join(sorted(changed))}"),
+            ]
+            if commit_idx > 0:
+                chunks.append(b"from :%d\n" % commit_idx)
+
+            for path in sorted(changed):
+                chunks.append(f"M 100644 inline {path}\n".encode("utf-8"))
+                chunks.append(self._data("\n".join(self.files[path]) + "\n"))
+
+            yield b"".join(chunks)
+
+    def generate(self, path: str) -> dict:
+        os.makedirs(path, exist_ok=True)
+        subprocess.run(["git", "init", "-q", path], check=True)
+        subprocess.run(["git", "symbolic-ref", "HEAD", "refs/heads/main"], cwd=path, check=True)
+
+        proc = subprocess.Popen(["git", "fast-import", "--quiet"], cwd=path, stdin=subprocess.PIPE)
+        try:
+            for chunk in self.iter_stream():
+                proc.stdin.write(chunk)
+        finally:
+            proc.stdin.close()
+            proc.wait()
+
+        if proc.returncode != 0:
+            raise RuntimeError(f"git fast-import exited with code {proc.returncode}")
+
+        subprocess.run(["git", "checkout", "-q", "-f", "main"], cwd=path, check=True)
+
+        return {"path": os.path.abspath(path), "params": self.params, "injected": dict(self.injected)}
+
+def main():
+    defaults = default_params()
+    parser = argparse.ArgumentParser(prog="synthetic_repo")
+    parser.add_argument("--path", type=str, required=True, help="Path of the new repository")
+    parser.add_argument("--commits", type=int, default=defaults["commits"], help="Count of commits")
+    parser.add_argument("--files-per-commit", type=int, default=defaults["files_per_commit"], help="Count of files changed by a commit")
+    parser.add_argument("--lines-per-diff", type=int, default=defaults["lines_per_diff"], help="Count of added lines per changed file")
+    parser.add_argument("--file-types", type=str, default=",".join(defaults["file_types"]), help="Comma separated extensions of the files")
+    parser.add_argument("--secret-density", type=float, default=defaults["secret_density"], help="Share of added lines with a fake secret")
+    parser.add_argument("--pii-density", type=float, default=defaults["pii_density"], help="Share of added lines with fake personal data")
+    parser.add_argument("--seed", type=int, default=defaults["seed"], help="Random seed")
+    parsed = parser.parse_args()
+
+    generator = RepoGenerator(
+        commits=parsed.commits,
+        files_per_commit=parsed.files_per_commit,
+        lines_per_diff=parsed.lines_per_diff,
+        file_types=parsed.file_types.split(","),
+        secret_density=parsed.secret_density,
+        pii_density=parsed.pii_density,
+        seed=parsed.seed,
+    )
+    print(json.dumps(generator.generate(parsed.path), indent=4))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Tables of the file classification stage: files which never contain real secrets or are not worth matching
+
+# Dependency lock files, matched by file name
+LOCK_FILES = [
+    "package-lock.json",
+    "npm-shrinkwrap.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+    "bun.lockb",
+    "poetry.lock",
+    "pipfile.lock",
+    "uv.lock",
+    "cargo.lock",
+    "gemfile.lock",
+    "composer.lock",
+    "go.sum",
+    "mix.lock",
+    "pubspec.lock",
+    "podfile.lock",
+    "packages.lock.json",
+    "flake.lock",
+]
+
+LOCK_EXTENSIONS = [
+    ".lock",
+]
+
+# Binary formats, images, fonts, media and archives
+BINARY_EXTENSIONS = [
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".icns", ".webp", ".tif", ".tiff", ".psd", ".svg",
+    ".woff", ".woff2", ".ttf", ".otf", ".eot",
+    ".mp3", ".mp4", ".m4a", ".wav", ".ogg", ".flac", ".avi", ".mov", ".mkv", ".webm",
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".tar", ".jar", ".war", ".ear", ".whl", ".egg",
+    ".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx",
+    ".exe", ".dll", ".so", ".dylib", ".a", ".o", ".obj", ".class", ".pyc", ".pyo", ".wasm",
+    ".bin", ".dat", ".db", ".sqlite", ".sqlite3",
+]
+
+# Minified bundles and source maps
+MINIFIED_SUFFIXES = [
+    ".min.js",
+    ".min.css",
+    ".min.mjs",
+    ".bundle.js",
+    ".chunk.js",
+    ".js.map",
+    ".css.map",
+]
+
+# Directories of vendored dependencies, matched by any lowercased path segment
+VENDORED_DIRS = [
+    "node_modules",
+    "bower_components",
+    "jspm_packages",
+    "vendor",
+    "third_party",
+    "third-party",
+    "thirdparty",
+    "site-packages",
+    ".yarn",
+    "pods",
+    "carthage",
+]
+
+# Code generated from other sources
+GENERATED_SUFFIXES = [
+    "_pb2.py",
+    "_pb2_grpc.py",
+    ".pb.go",
+    ".pb.cc",
+    ".pb.h",
+    ".g.dart",
+    ".freezed.dart",
+    ".designer.cs",
+    ".generated.cs",
+    ".generated.ts",
+]
+
+# Directories of generated code, matched by any lowercased path segment
+GENERATED_DIRS = [
+    "dist",
+    "__generated__",
+    ".next",
+]
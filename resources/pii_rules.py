@@ -0,0 +1,224 @@
+# Tables of the local validation of sensitive matches: rules of pii-stable.yml by the validator which settles
+# their matches, and the reference data of the validators
+
+CARD_RULES = [
+    "visa_credit_card",
+    "american_express_credit-card",
+    "credit card - 2",
+    "Credit card - 3",
+    "Amex Card",
+    "BCGlobal",
+    "Carte Blanche Card",
+    "Diners Club Card",
+    "Discover Card",
+    "Insta Payment Card",
+    "JCB Card",
+    "Korean Local Card",
+    "Laser Card",
+    "Maestro Card",
+    "MasterCard",
+    "Solo Card",
+    "Switch Card",
+    "credit_cards",
+    "visa_cards",
+    "master_cards",
+]
+
+IBAN_RULES = [
+    "iban_numbers",
+    "IBAN",
+]
+
+SSN_RULES = [
+    "ssn - 3",
+    "ssn_number",
+    "ssn_number - 3",
+    "Social Security Number (SSN) - 3",
+    "Social Security Number (SSN) - 4",
+]
+
+PHONE_RULES = [
+    "phones",
+    "phones_with_exts",
+    "ukphones",
+    "UK Phone Numbers",
+    "US Phone Numbers",
+    "Large number of US Phone Numbers",
+]
+
+EMAIL_RULES = [
+    "emails",
+    "email - 3",
+    "Email Addresses",
+]
+
+IP_RULES = [
+    "ipv4",
+]
+
+# Times of day, prices and colors are never personal data on their own
+NOISE_RULES = [
+    "times",
+    "prices",
+    "hex_colors",
+]
+
+# Issuer prefix ranges (inclusive, compared on the prefix length) and lengths of card numbers
+CARD_BRANDS = {
+    "visa": {"prefixes": [("4", "4")], "lengths": [13, 16, 19]},
+    "mastercard": {"prefixes": [("51", "55"), ("2221", "2720")], "lengths": [16]},
+    "amex": {"prefixes": [("34", "34"), ("37", "37")], "lengths": [15]},
+    "discover": {"prefixes": [("6011", "6011"), ("644", "649"), ("65", "65")], "lengths": [16, 17, 18, 19]},
+    "diners": {"prefixes": [("300", "305"), ("36", "36"), ("38", "39")], "lengths": [14, 15, 16, 17, 18, 19]},
+    "jcb": {"prefixes": [("3528", "3589")], "lengths": [16, 17, 18, 19]},
+    "unionpay": {"prefixes": [("62", "62")], "lengths": [16, 17, 18, 19]},
+    "maestro": {
+        "prefixes": [("5018", "5018"), ("5020", "5020"), ("5038", "5038"), ("5893", "5893"), ("6304", "6304"),
+                     ("6759", "6759"), ("6761", "6763")],
+        "lengths": [12, 13, 14, 15, 16, 17, 18, 19],
+    },
+}
+
+# Test numbers published by payment providers, they pass the Luhn check
+TEST_CARD_NUMBERS = [
+    "4111111111111111",
+    "4242424242424242",
+    "4012888888881881",
+    "4000056655665556",
+    "4222222222222",
+    "5555555555554444",
+    "5105105105105100",
+    "5200828282828210",
+    "2223003122003222",
+    "378282246310005",
+    "371449635398431",
+    "378734493671000",
+    "6011111111111117",
+    "6011000990139424",
+    "30569309025904",
+    "38520000023237",
+    "3530111333300000",
+    "3566002020360505",
+    "6200000000000005",
+]
+
+# Lengths of IBANs by country
+IBAN_LENGTHS = {
+    "AD": 24, "AE": 23, "AL": 28, "AT": 20, "AZ": 28, "BA": 20, "BE": 16, "BG": 22, "BH": 22, "BR": 29,
+    "BY": 28, "CH": 21, "CR": 22, "CY": 28, "CZ": 24, "DE": 22, "DK": 18, "DO": 28, "EE": 20, "EG": 29,
+    "ES": 24, "FI": 18, "FO": 18, "FR": 27, "GB": 22, "GE": 22, "GI": 23, "GL": 18, "GR": 27, "GT": 28,
+    "HR": 21, "HU": 28, "IE": 22, "IL": 23, "IQ": 23, "IS": 26, "IT": 27, "JO": 30, "KW": 30, "KZ": 20,
+    "LB": 28, "LC": 32, "LI": 21, "LT": 20, "LU": 20, "LV": 21, "MC": 27, "MD": 24, "ME": 22, "MK": 19,
+    "MR": 27, "MT": 31, "MU": 30, "NL": 18, "NO": 15, "PK": 24, "PL": 28, "PS": 29, "PT": 25, "QA": 29,
+    "RO": 24, "RS": 22, "SA": 24, "SC": 31, "SE": 24, "SI": 19, "SK": 24, "SM": 27, "ST": 25, "SV": 28,
+    "TL": 23, "TN": 24, "TR": 26, "UA": 29, "VA": 22, "VG": 24, "XK": 20,
+}
+
+# IBANs of standards, bank documentation and tutorials
+EXAMPLE_IBANS = [
+    "GB82WEST12345698765432",
+    "GB29NWBK60161331926819",
+    "GB33BUKB20201555555555",
+    "DE89370400440532013000",
+    "DE44500105175407324931",
+    "FR1420041010050500013M02606",
+    "FR7630006000011234567890189",
+    "NL91ABNA0417164300",
+    "CH9300762011623852957",
+    "ES9121000418450200051332",
+    "IT60X0542811101000000123456",
+    "BE68539007547034",
+    "AT611904300234573201",
+]
+
+# SSNs which were published in advertising or are used as examples
+EXAMPLE_SSNS = [
+    "078051120",
+    "219099999",
+    "123456789",
+    "987654320",
+]
+
+# Domains reserved for documentation and testing (RFC 2606, RFC 6761) and common placeholders
+EXAMPLE_EMAIL_DOMAINS = [
+    "example.com",
+    "example.net",
+    "example.org",
+    "example.edu",
+    "domain.com",
+    "yourdomain.com",
+    "mydomain.com",
+    "yourcompany.com",
+    "company.com",
+    "email.tld",
+]
+
+RESERVED_TLDS = [
+    "test",
+    "example",
+    "invalid",
+    "localhost",
+    "local",
+    "internal",
+]
+
+# "icon@2x.png", "lib@1.2.3": file names and package specs which look like emails
+FILE_EXTENSION_TLDS = [
+    "png", "jpg", "jpeg", "gif", "svg", "webp", "ico", "bmp",
+    "js", "mjs", "cjs", "ts", "tsx", "jsx", "css", "scss", "less", "map", "json",
+    "py", "rb", "go", "java", "php", "html", "htm", "xml", "yml", "yaml", "md", "txt", "lock",
+]
+
+# Local parts of service addresses: git remotes are not personal data, role accounts may or may not be
+SERVICE_EMAIL_LOCAL_PARTS = [
+    "git",
+]
+
+# Local parts of placeholder addresses of docs, fixtures and forms ("test@corp.com", "john.doe@bank.com")
+PLACEHOLDER_EMAIL_LOCAL_PARTS = [
+    "test",
+    "tester",
+    "example",
+    "sample",
+    "dummy",
+    "fake",
+    "mock",
+    "placeholder",
+    "user",
+    "username",
+    "name",
+    "email",
+    "someone",
+    "somebody",
+    "nobody",
+    "foo",
+    "bar",
+    "foobar",
+    "john.doe",
+    "jane.doe",
+    "johndoe",
+    "janedoe",
+    "your.name",
+    "yourname",
+    "your.email",
+    "youremail",
+    "first.last",
+    "firstname.lastname",
+]
+
+ROLE_EMAIL_LOCAL_PARTS = [
+    "admin",
+    "contact",
+    "hello",
+    "help",
+    "info",
+    "no-reply",
+    "noreply",
+    "postmaster",
+    "privacy",
+    "sales",
+    "security",
+    "support",
+    "team",
+    "webmaster",
+]
@@ -9,8 +9,8 @@ args = [
     {
         "name": "--n",
         "type": int,
-        "required": True,
-        "help": "Number of last commits to be scanned"
+        "required": False,
+        "help": "Number of last commits to be scanned (all commits if omitted)"
     },
     {
         "name": "--out",
@@ -23,5 +23,280 @@ args = [
         "action": "store_true",
         "required": False,
         "help": "Scan for sensitive data and not for secrets."
+    },
+    {
+        "name": "--mode",
+        "type": str,
+        "choices": ["secrets", "sensitive", "all"],
+        "default": None,
+        "required": False,
+        "help": "Categories to scan for: secrets, sensitive data or both in a single pass (--sensitive is the same as --mode sensitive)."
+    },
+    {
+        "name": "--engine",
+        "type": str,
+        "choices": ["line", "patch"],
+        "default": "line",
+        "required": False,
+        "help": "Regex engine mode: match rules line by line or once per whole diff."
+    },
+    {
+        "name": "--workers",
+        "type": int,
+        "default": 1,
+        "required": False,
+        "help": "Number of processes for the heuristic (regex) stage."
+    },
+    {
+        "name": "--diff-backend",
+        "type": str,
+        "choices": ["gitpython", "git-log"],
+        "default": "gitpython",
+        "required": False,
+        "help": "How diffs are read: GitPython call per commit or one streaming 'git log -p' process."
+    },
+    {
+        "name": "--incremental",
+        "action": "store_true",
+        "required": False,
+        "help": "Scan only commits not scanned before with the same rules and prompts, reuse stored findings for the rest."
+    },
+    {
+        "name": "--no-llm-cache",
+        "action": "store_true",
+        "required": False,
+        "help": "Do not use the persistent cache of LLM verdicts."
+    },
+    {
+        "name": "--llm-cache-ttl",
+        "type": int,
+        "default": 7 * 24 * 60 * 60,
+        "required": False,
+        "help": "Time to live of cached LLM verdicts in seconds."
+    },
+    {
+        "name": "--llm-cache-size",
+        "type": int,
+        "default": 100000,
+        "required": False,
+        "help": "Maximal count of cached LLM verdicts, least recently used ones are evicted."
+    },
+    {
+        "name": "--llm-engine",
+        "type": str,
+        "choices": ["threads", "async"],
+        "default": "threads",
+        "required": False,
+        "help": "LLM verification engine: fixed thread pool or asyncio with adaptive concurrency and retries."
+    },
+    {
+        "name": "--llm-input-tokens",
+        "type": int,
+        "default": 6000,
+        "required": False,
+        "help": "Input tokens budget of one LLM request, candidates are packed into batches up to it."
+    },
+    {
+        "name": "--llm-output-tokens",
+        "type": int,
+        "default": 512,
+        "required": False,
+        "help": "Output tokens budget (max_tokens) of one LLM request."
+    },
+    {
+        "name": "--no-dedup",
+        "action": "store_true",
+        "required": False,
+        "help": "Send every occurrence of a secret to the LLM and report every occurrence as a separate finding."
+    },
+    {
+        "name": "--no-detection-cache",
+        "action": "store_true",
+        "required": False,
+        "help": "Do not reuse heuristic detection results of identical patches from the persistent cache."
+    },
+    {
+        "name": "--profile",
+        "action": "store_true",
+        "required": False,
+        "help": "Record per-stage time, counters and per-rule match time into <out>.metrics.json."
+    },
+    {
+        "name": "--rule-budget",
+        "type": float,
+        "default": 0.5,
+        "required": False,
+        "help": "Seconds one rule may spend on one long line or patch. Rules exceeding it 3 times are quarantined, 0 disables the budget."
+    },
+    {
+        "name": "--line-window",
+        "type": int,
+        "default": 4096,
+        "required": False,
+        "help": "Lines longer than this are matched in overlapping windows of this length, 0 matches whole lines."
+    },
+    {
+        "name": "--bound-rules",
+        "type": int,
+        "default": 0,
+        "required": False,
+        "help": "Bound unbounded repeats (+, *, {n,}) of the rules flagged by the linter to this count, 0 keeps rules as they are."
+    },
+    {
+        "name": "--allow-path",
+        "type": str,
+        "action": "append",
+        "default": [],
+        "required": False,
+        "help": "Glob of paths which are always scanned, even if they look like lock, vendored, minified or binary files. Can be repeated."
+    },
+    {
+        "name": "--deny-path",
+        "type": str,
+        "action": "append",
+        "default": [],
+        "required": False,
+        "help": "Glob of paths which are never scanned. Can be repeated."
+    },
+    {
+        "name": "--max-patch-size",
+        "type": int,
+        "default": 1000000,
+        "required": False,
+        "help": "Patches of a file longer than this count of characters are skipped, 0 disables the limit."
+    },
+    {
+        "name": "--no-file-filter",
+        "action": "store_true",
+        "required": False,
+        "help": "Scan every file diff, including lock files, vendored dependencies, binaries and minified bundles."
+    },
+    {
+        "name": "--range",
+        "type": str,
+        "required": False,
+        "help": "Scan commits of the revision range (e.g. origin/main..HEAD) instead of all branches."
+    },
+    {
+        "name": "--staged",
+        "action": "store_true",
+        "required": False,
+        "help": "Scan only the staged changes (the index against HEAD), for pre-commit hooks."
+    },
+    {
+        "name": "--defer-llm",
+        "action": "store_true",
+        "required": False,
+        "help": "Don't wait for the LLM: escalated candidates are verified by a background process into <out>.llm.json."
+    },
+    {
+        "name": "--exit-code",
+        "action": "store_true",
+        "required": False,
+        "help": "Exit with 1 if anything was found."
+    }
+]
+
+# Args of the long-running modes (daemon, fleet), which keep one rule set, LLM client and caches for all jobs
+shared_args = [
+    {
+        "name": "--llm-concurrency",
+        "type": int,
+        "default": 9,
+        "required": False,
+        "help": "Count of LLM requests in flight shared by all jobs."
+    },
+    {
+        "name": "--no-llm-cache",
+        "action": "store_true",
+        "required": False,
+        "help": "Do not use the persistent LLM verdicts cache."
+    },
+    {
+        "name": "--no-detection-cache",
+        "action": "store_true",
+        "required": False,
+        "help": "Do not reuse heuristic detection results of identical patches from the persistent cache."
+    },
+    {
+        "name": "--rule-budget",
+        "type": float,
+        "default": 0.5,
+        "required": False,
+        "help": "Seconds one rule may spend on one long line or patch. Rules exceeding it 3 times are quarantined, 0 disables the budget."
+    },
+    {
+        "name": "--line-window",
+        "type": int,
+        "default": 4096,
+        "required": False,
+        "help": "Lines longer than this are matched in overlapping windows of this length, 0 matches whole lines."
+    },
+    {
+        "name": "--bound-rules",
+        "type": int,
+        "default": 0,
+        "required": False,
+        "help": "Bound unbounded repeats (+, *, {n,}) of the rules flagged by the linter to this count, 0 keeps rules as they are."
     }
-]
\ No newline at end of file
+]
+
+# CLI args of the scan daemon (src.daemon)
+daemon_args = [
+    {
+        "name": "--socket",
+        "type": str,
+        "required": False,
+        "help": "Path of the Unix socket, seeker_tmp/daemon.sock by default."
+    },
+    {
+        "name": "--submit",
+        "type": str,
+        "required": False,
+        "help": "Send the JSON job to a running daemon and print its events instead of starting a daemon."
+    },
+    *shared_args,
+]
+
+fleet_args = [
+    {
+        "name": "--manifest",
+        "type": str,
+        "required": True,
+        "help": "Path to the manifest: JSON list of repository paths/URLs or of jobs ({\"repo\", \"n\", \"mode\", ...})."
+    },
+    {
+        "name": "--out-dir",
+        "type": str,
+        "required": True,
+        "help": "Directory of the per-repository reports and the summary."
+    },
+    {
+        "name": "--n",
+        "type": int,
+        "required": False,
+        "help": "Number of last commits of the repositories whose jobs don't set it (all commits if omitted)."
+    },
+    {
+        "name": "--clone-concurrency",
+        "type": int,
+        "default": 4,
+        "required": False,
+        "help": "Count of repositories cloned or fetched at once."
+    },
+    {
+        "name": "--scan-workers",
+        "type": int,
+        "default": 2,
+        "required": False,
+        "help": "Number of processes of the heuristic stage, each one scans one repository at a time."
+    },
+    {
+        "name": "--verify-concurrency",
+        "type": int,
+        "default": 4,
+        "required": False,
+        "help": "Count of repositories verified by the LLM at once."
+    },
+    *shared_args,
+]
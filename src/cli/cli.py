@@ -25,4 +25,24 @@ class CLI:
 
     # Simple by-name get method
     def get_arg(self, name: str):
-        return getattr(self.args, name)
\ No newline at end of file
+        return getattr(self.args, name)
+
+# Same interface as CLI for scans started without a command line (daemon jobs): defaults of the args
+# with the given values
+class StaticCLI:
+    def __init__(self, args: List[Dict[str, Any]], **values):
+        self.values = {}
+
+        for arg in args:
+            default = False if arg.get("action") == "store_true" else None
+            name = arg.get("name") or arg["flags"][-1]
+            self.values[name.lstrip("-").replace("-", "_")] = arg.get("default", default)
+
+        unknown = set(values) - set(self.values)
+        if unknown:
+            raise ValueError(f"Unknown args: {', '.join(sorted(unknown))}")
+
+        self.values.update(values)
+
+    def get_arg(self, name: str):
+        return self.values[name]
\ No newline at end of file
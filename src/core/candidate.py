@@ -0,0 +1,135 @@
+from src.core.repository import context_lines, context_span
+
+# Metadata of a scanned commit shared by all its candidates. Candidates never reference the commit dict
+# itself, which would keep the commit object and its patches alive until the end of the run
+class CommitInfo:
+    __slots__ = ("hash", "message")
+
+    def __init__(self, _hash: str, message: str):
+        self.hash = _hash
+        self.message = message
+
+# Table of the interned commits of a run
+class CommitTable:
+    def __init__(self):
+        self.commits = {}
+
+    def intern(self, commit) -> CommitInfo:
+        info = self.commits.get(commit["hash"])
+        if info is None:
+            info = self.commits[commit["hash"]] = CommitInfo(commit["hash"], commit["message"])
+
+        return info
+
+    def __len__(self):
+        return len(self.commits)
+
+# Heuristic hit. Context is not copied out of the patch: the candidate keeps the raw patch (shared by all
+# candidates of the diff) and the offset of its line, context lines are decoded only when an LLM item is built
+class Candidate:
+    __slots__ = (
+        "kind",
+        "category",
+        "id",
+        "commit",
+        "line",
+        "rule",
+        "value",
+        "file",
+        "entropy",
+        "uri_detected",
+        "patch",
+        "context_offset",
+        "context_start",
+    )
+
+    # Fields which depend on the commit being scanned, not on the patch
+    BOUND_FIELDS = ("id", "commit", "patch")
+
+    def __init__(
+            self,
+            _id: int | None,
+            commit: CommitInfo | None,
+            line: int | None,
+            rule: str,
+            value: str,
+            file: str,
+            context_offset: int | None,
+            context_start: int | None = None,
+            kind: str | None = None,
+            entropy: float | None = None,
+            uri_detected=None,
+            patch: bytes | None = None,
+            category: str | None = None,
+    ):
+        self.kind = kind
+        self.category = category
+        self.id = _id
+        self.commit = commit
+        self.line = line
+        self.rule = rule
+        self.value = value
+        self.file = file
+        self.entropy = entropy
+        self.uri_detected = uri_detected
+        self.patch = patch
+        self.context_offset = context_offset
+        self.context_start = context_start
+
+    # Context lines around the hit, None if the candidate isn't bound to a patch
+    @property
+    def context(self):
+        if self.patch is None or self.context_offset is None:
+            return None
+
+        return context_lines(self.patch, self.context_offset)
+
+    def bind(self, _id: int, commit: CommitInfo, patch: bytes):
+        self.id = _id
+        self.commit = commit
+        self.patch = patch
+        return self
+
+    # Fields of the candidate which don't depend on the commit (stored in the detection cache)
+    def to_state(self) -> dict:
+        return {
+            name: getattr(self, name)
+            for name in self.__slots__
+            if name not in self.BOUND_FIELDS
+        }
+
+    @classmethod
+    def from_state(cls, state: dict):
+        candidate = cls(None, None, state["line"], state["rule"], state["value"], state["file"], None)
+        for name, value in state.items():
+            setattr(candidate, name, value)
+
+        return candidate
+
+    # Self-contained state with the id, the commit and only the context window of the patch (deferred LLM stage).
+    # The window is stored decoded, the offset is moved to the same line of the decoded window
+    def to_detached_state(self) -> dict:
+        state = {**self.to_state(), "id": self.id, "commit": [self.commit.hash, self.commit.message]}
+        if self.patch is not None and self.context_offset is not None:
+            begin, end = context_span(self.patch, self.context_offset)
+            window = self.patch[begin:end]
+            state["patch"] = window.decode("utf-8", errors="ignore")
+            state["context_offset"] = len(
+                window[:self.context_offset - begin].decode("utf-8", errors="ignore").encode("utf-8")
+            )
+
+        return state
+
+    @classmethod
+    def from_detached_state(cls, state: dict):
+        state = dict(state)
+        commit = CommitInfo(*state.pop("commit"))
+        patch = state.pop("patch", None)
+
+        candidate = cls.from_state(state)
+        candidate.commit = commit
+        candidate.patch = None if patch is None else patch.encode("utf-8")
+        return candidate
+
+    def __repr__(self):
+        return f"Candidate(id={self.id}, rule={self.rule!r}, file={self.file!r}, line={self.line})"
@@ -0,0 +1,145 @@
+import os
+from fnmatch import fnmatch
+from typing import Iterable
+
+from resources.file_rules import LOCK_FILES, LOCK_EXTENSIONS, BINARY_EXTENSIONS, MINIFIED_SUFFIXES, \
+    VENDORED_DIRS, GENERATED_SUFFIXES, GENERATED_DIRS
+
+# What the scanner does with a file diff: match it, skip it, or match it and send every hit to the LLM
+SCAN = "scan"
+SKIP = "skip"
+DOWNGRADE = "downgrade"
+
+DELETED = "deleted"
+DENIED = "denied"
+BINARY = "binary"
+LOCK = "lock"
+VENDORED = "vendored"
+MINIFIED = "minified"
+GENERATED = "generated"
+TOO_LARGE = "too_large"
+
+DEFAULT_ACTIONS = {
+    DELETED: SKIP,
+    DENIED: SKIP,
+    BINARY: SKIP,
+    LOCK: SKIP,
+    VENDORED: SKIP,
+    TOO_LARGE: SKIP,
+    # Built bundles and generated code do leak real keys, their hits are only checked by the LLM
+    MINIFIED: DOWNGRADE,
+    GENERATED: DOWNGRADE,
+}
+
+DEFAULT_MAX_PATCH_SIZE = 1_000_000
+
+# Content sniffing looks at the added lines in the first SNIFF_BYTES bytes of the patch
+SNIFF_BYTES = 65536
+MINIFIED_LINE_LENGTH = 1000
+NON_PRINTABLE_RATIO = 0.1
+
+# Git's replacement of the patch of a binary file
+BINARY_PATCH_MARKERS = (b"Binary files ", b"GIT binary patch")
+
+_LOCK_FILES = frozenset(LOCK_FILES)
+_BINARY_EXTENSIONS = frozenset(BINARY_EXTENSIONS)
+_VENDORED_DIRS = frozenset(VENDORED_DIRS)
+_GENERATED_DIRS = frozenset(GENERATED_DIRS)
+
+# Average length and share of non-printable characters of the added lines
+def sniff_added_lines(patch: bytes):
+    lines = 0
+    chars = 0
+    non_printable = 0
+
+    for line in patch[:SNIFF_BYTES].split(b"\n"):
+        if not line.startswith(b"+") or line.startswith(b"+++"):
+            continue
+
+        text = line[1:].decode("utf-8", errors="replace")
+        lines += 1
+        chars += len(text)
+        non_printable += sum(1 for c in text if (c < " " and c not in "\t\r") or c == "�")
+
+    if not lines:
+        return 0.0, 0.0
+
+    return chars / lines, non_printable / max(1, chars)
+
+# Category of the file by its path alone, None for regular source files
+def classify_path(path: str):
+    lowered = path.lower()
+    name = os.path.basename(lowered)
+    dirs = lowered.split("/")[:-1]
+
+    if name in _LOCK_FILES or os.path.splitext(name)[1] in LOCK_EXTENSIONS:
+        return LOCK
+    if os.path.splitext(name)[1] in _BINARY_EXTENSIONS:
+        return BINARY
+    if any(part in _VENDORED_DIRS for part in dirs):
+        return VENDORED
+    if name.endswith(tuple(MINIFIED_SUFFIXES)):
+        return MINIFIED
+    if name.endswith(tuple(GENERATED_SUFFIXES)) or any(part in _GENERATED_DIRS for part in dirs):
+        return GENERATED
+
+    return None
+
+# Classification stage in front of the regex scanning. Allow-list globs force scanning of matching paths,
+# deny-list globs skip them. Globs are matched against the whole path ("*" matches "/" too)
+class FileClassifier:
+    def __init__(
+            self,
+            allow: Iterable[str] = (),
+            deny: Iterable[str] = (),
+            max_patch_size: int = DEFAULT_MAX_PATCH_SIZE,
+            actions: dict | None = None,
+    ):
+        self.allow = tuple(allow or ())
+        self.deny = tuple(deny or ())
+        self.max_patch_size = max_patch_size
+        self.actions = actions or DEFAULT_ACTIONS
+        self.stats = {}
+
+    def category(self, diff):
+        path = diff["file"]
+        if path is None:
+            return DELETED
+
+        if any(fnmatch(path, glob) for glob in self.deny):
+            return DENIED
+        if any(fnmatch(path, glob) for glob in self.allow):
+            return None
+
+        category = classify_path(path)
+        if category is not None:
+            return category
+
+        patch = diff["patch"]
+        if patch.startswith(BINARY_PATCH_MARKERS):
+            return BINARY
+        if self.max_patch_size > 0 and len(patch) > self.max_patch_size:
+            return TOO_LARGE
+
+        average_length, non_printable = sniff_added_lines(patch)
+        if non_printable > NON_PRINTABLE_RATIO:
+            return BINARY
+        if average_length > MINIFIED_LINE_LENGTH:
+            return MINIFIED
+
+        return None
+
+    # Returns action for the diff and records it in the stats
+    def classify(self, diff) -> str:
+        category = self.category(diff)
+        action = SCAN if category is None else self.actions.get(category, SCAN)
+
+        key = category or SCAN
+        stats = self.stats.setdefault(key, {"action": action, "files": 0, "bytes": 0})
+        stats["files"] += 1
+        stats["bytes"] += len(diff["patch"])
+
+        return action
+
+    def report(self):
+        return dict(sorted(self.stats.items()))
@@ -0,0 +1,65 @@
+from typing import List
+
+from src.core.candidate import Candidate
+from src.helpers.hashing_helper import secret_fingerprint
+
+# Occurrences of one secret share normalized value and rule
+def occurrence_key(value: str, rule: str):
+    return secret_fingerprint(value), rule
+
+# Amount of meaningful text around the token: blank context lines say nothing to the LLM
+def context_richness(candidate) -> int:
+    return sum(len(line.strip()) for line in candidate.context or ())
+
+# Groups candidates by secret, so every distinct secret is verified by the LLM only once
+class OccurrenceGroups:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.groups = {}
+        self.by_id = {}
+        self.candidates = 0
+
+    def add(self, candidate):
+        if self.enabled:
+            key = occurrence_key(candidate.value, candidate.rule)
+        else:
+            key = candidate.id
+
+        group = self.groups.setdefault(key, [])
+        group.append(candidate)
+        self.by_id[candidate.id] = group
+        self.candidates += 1
+
+    # One candidate per group, the one with the richest context (the first one on ties)
+    def representatives(self) -> List[Candidate]:
+        return [max(group, key=context_richness) for group in self.groups.values()]
+
+    # All candidates of the group the candidate with the id belongs to
+    def occurrences(self, _id) -> List[Candidate]:
+        return self.by_id[_id]
+
+    def stats(self):
+        return {
+            "candidates": self.candidates,
+            "distinct": len(self.groups),
+        }
+
+# Merge findings of the same secret into one finding with the list of its occurrences.
+# The first finding (in report order) describes the secret
+def collapse_findings(findings: List[dict]) -> List[dict]:
+    collapsed = {}
+
+    for finding in findings:
+        key = occurrence_key(finding["snippet"], finding["finding_type"])
+        occurrence = {
+            "commit_hash": finding["commit_hash"],
+            "file_path": finding["file_path"],
+            "line": finding["line"],
+        }
+
+        if key in collapsed:
+            collapsed[key]["occurrences"].append(occurrence)
+        else:
+            collapsed[key] = {**finding, "occurrences": [occurrence]}
+
+    return list(collapsed.values())
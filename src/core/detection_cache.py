@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from src.core.candidate import Candidate
+from src.core.repository import TMP_FOLDER
+
+CACHE_DB_NAME = "detections.sqlite3"
+
+DEFAULT_MAX_ENTRIES = 500_000
+
+# Count of new entries kept in memory before they are written in one transaction
+FLUSH_SIZE = 1000
+
+# Bump when the stored candidate fields or the heuristics which decide them change
+CACHE_FORMAT_VERSION = 5
+
+# Persistent heuristic detection results keyed by content of a file patch. The same patch seen again
+# (cherry-picks, rebased branches, merge commits) gets its candidates without parsing and matching.
+# Entries are dropped as soon as the rules files or the matching settings change. Safe to share between threads
+class DetectionCache:
+    def __init__(self, rules_version: str, path: str | None = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        if path is None:
+            tmp_folder = os.path.abspath(TMP_FOLDER)
+            os.makedirs(tmp_folder, exist_ok=True)
+            path = os.path.join(tmp_folder, CACHE_DB_NAME)
+
+        self.rules_version = f"{rules_version}-v{CACHE_FORMAT_VERSION}"
+        self.max_entries = max_entries
+        self.pending = {}
+        self.touched = set()
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS detections (
+                key TEXT PRIMARY KEY,
+                rules_version TEXT NOT NULL,
+                candidates TEXT NOT NULL,
+                used_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS detections_used_at ON detections (used_at);
+        """)
+
+        with self.conn:
+            self.conn.execute("DELETE FROM detections WHERE rules_version != ?", (self.rules_version,))
+
+    # Candidates depend on the mode, the file path (escalation heuristics look at it) and the patch text
+    @staticmethod
+    def key(diff, mode: str) -> str:
+        h = hashlib.sha256()
+        h.update(f"{mode}\x00{diff['file']}\x00".encode("utf-8", "ignore"))
+        h.update(diff["patch"])
+        return h.hexdigest()
+
+    # Returns candidates without id, commit and patch, or None
+    def get(self, key: str):
+        with self._lock:
+            raw = self.pending.get(key)
+
+            if raw is None:
+                row = self.conn.execute(
+                    "SELECT candidates FROM detections WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    raw = row[0]
+                    self.touched.add(key)
+
+            if raw is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+
+        return [Candidate.from_state(state) for state in json.loads(raw)]
+
+    def put(self, key: str, candidates):
+        raw = json.dumps([candidate.to_state() for candidate in candidates])
+
+        with self._lock:
+            self.pending[key] = raw
+            if len(self.pending) >= FLUSH_SIZE:
+                self.flush()
+
+    # Write new entries, refresh usage time of the hit ones and evict the least recently used above max_entries
+    def flush(self):
+        now = time.time()
+
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO detections VALUES (?, ?, ?, ?)",
+                [(key, self.rules_version, raw, now) for key, raw in self.pending.items()],
+            )
+            self.conn.executemany(
+                "UPDATE detections SET used_at = ? WHERE key = ?",
+                [(now, key) for key in self.touched],
+            )
+            self.conn.execute(
+                "DELETE FROM detections WHERE key IN ("
+                "SELECT key FROM detections ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+            self.pending.clear()
+            self.touched.clear()
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def close(self):
+        self.flush()
+        self.conn.close()
@@ -0,0 +1,99 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from src.core.repository import TMP_FOLDER
+from src.helpers.hashing_helper import secret_fingerprint
+
+CACHE_DB_NAME = "llm_cache.sqlite3"
+
+DEFAULT_TTL = 7 * 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 100_000
+
+# Cache key of a verdict. Same value detected by the same rule gets the same verdict
+# as long as mode, model and prompt stay the same
+def verdict_key(value: str, rule: str, mode: str, model: str, prompt_version: str) -> str:
+    raw = "\x00".join((secret_fingerprint(value), rule, mode, model or "", prompt_version))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+# Persistent LLM verdicts cache with TTL and LRU eviction by count of entries. Safe to share between threads
+class VerdictCache:
+    def __init__(self, path: str | None = None, ttl: int = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        if path is None:
+            tmp_folder = os.path.abspath(TMP_FOLDER)
+            os.makedirs(tmp_folder, exist_ok=True)
+            path = os.path.join(tmp_folder, CACHE_DB_NAME)
+
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS verdicts (
+                key TEXT PRIMARY KEY,
+                label TEXT NOT NULL,
+                reason TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                used_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS verdicts_used_at ON verdicts (used_at);
+        """)
+
+    # Returns (label, reason) or None. Expired entries are removed
+    def get(self, key: str):
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key: str):
+        now = time.time()
+        row = self.conn.execute("SELECT label, reason, created_at FROM verdicts WHERE key = ?", (key,)).fetchone()
+
+        if row is None or row[2] + self.ttl < now:
+            if row is not None:
+                with self.conn:
+                    self.conn.execute("DELETE FROM verdicts WHERE key = ?", (key,))
+            self.misses += 1
+            return None
+
+        with self.conn:
+            self.conn.execute("UPDATE verdicts SET used_at = ? WHERE key = ?", (now, key))
+
+        self.hits += 1
+        return row[0], row[1]
+
+    def put_many(self, verdicts):
+        now = time.time()
+        rows = [(key, label, reason, now, now) for key, label, reason in verdicts]
+
+        with self._lock:
+            with self.conn:
+                self.conn.executemany("INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?, ?)", rows)
+            self._evict()
+
+    # Drop expired entries and the least recently used ones above max_entries
+    def evict(self):
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM verdicts WHERE created_at < ?", (time.time() - self.ttl,))
+            self.conn.execute(
+                "DELETE FROM verdicts WHERE key IN ("
+                "SELECT key FROM verdicts ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def close(self):
+        self.conn.close()
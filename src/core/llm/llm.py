@@ -1,13 +1,21 @@
-from groq import Groq
-
 from src.core.llm.prompts_manager import getVerifyPrompt
 
+# The SDK is imported when the first request is made, so scans without escalations never load it
 class LLM:
     def __init__(self, api_key: str, model: str):
-        self.client = Groq(api_key=api_key)
+        self.api_key = api_key
         self.model = model
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from groq import Groq
+            self._client = Groq(api_key=self.api_key)
 
-    def verifyBatch(self, batch, schema, prompt_filename):
+        return self._client
+
+    def verifyBatch(self, batch, schema, prompt_filename, max_tokens=512):
         if isinstance(batch, dict):
             items = [batch]
         else:
@@ -24,7 +32,44 @@ class LLM:
             response_format=schema,
             temperature=0,
             top_p=1,
-            max_tokens=512,
+            max_tokens=max_tokens,
+        )
+
+        return completion.choices[0].message.content
+
+# Asyncio client for the adaptive verification engine. Retries are done by the engine, not by the SDK
+class AsyncLLM:
+    def __init__(self, api_key: str, model: str):
+        self.api_key = api_key
+        self.model = model
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from groq import AsyncGroq
+            self._client = AsyncGroq(api_key=self.api_key, max_retries=0)
+
+        return self._client
+
+    async def verifyBatch(self, batch, schema, prompt_filename, max_tokens=512):
+        if isinstance(batch, dict):
+            items = [batch]
+        else:
+            items = batch
+
+        completion = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {
+                    "role": "user",
+                    "content": getVerifyPrompt(items, prompt_filename)
+                }
+            ],
+            response_format=schema,
+            temperature=0,
+            top_p=1,
+            max_tokens=max_tokens,
         )
 
-        return completion.choices[0].message.content
\ No newline at end of file
+        return completion.choices[0].message.content
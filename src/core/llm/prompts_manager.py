@@ -1,13 +1,101 @@
+import json
+from functools import lru_cache
 from pathlib import Path
 
-def getVerifyPrompt(batch, filename):
-    path = Path(__file__).parent / "prompts" / filename
-    text = path.read_text(encoding="utf-8")
+# Item fields which are moved into the shared COMMITS and CONTEXTS sections of the prompt
+SHARED_FIELDS = ("commit_hash", "commit_message", "context", "context_start")
+
+def getPromptPath(filename) -> Path:
+    return Path(__file__).parent / "prompts" / filename
+
+# Templates are read once per process, not once per request
+@lru_cache(maxsize=None)
+def getPromptTemplate(filename) -> str:
+    return getPromptPath(filename).read_text(encoding="utf-8")
+
+# Merge context windows of the items from the same file diff, overlapping windows become one hunk.
+# Returns list of (file, lines) contexts and {item id: context index}
+def _mergeContexts(batch):
+    groups = {}
+
+    for item in batch:
+        context = item.get("context")
+        if context is None:
+            continue
+
+        file_name = item.get("file", item.get("file_name"))
+        start = item.get("context_start")
+
+        # Without a position in the patch only equal contexts can be shared
+        if start is None:
+            key = (item.get("commit_hash"), file_name, tuple(context))
+            start = 0
+        else:
+            key = (item.get("commit_hash"), file_name)
+
+        groups.setdefault(key, []).append((start, item))
+
+    contexts = []
+    refs = {}
+
+    for key, entries in groups.items():
+        end = None
+        for start, item in sorted(entries, key=lambda e: e[0]):
+            lines = item["context"]
+
+            if end is None or start > end:
+                contexts.append((key[1], list(lines)))
+                end = start + len(lines)
+            elif start + len(lines) > end:
+                contexts[-1][1].extend(lines[end - start:])
+                end = start + len(lines)
 
-    for c in batch:
-        c_text = " ".join(f"{k}={v}" for k, v in c.items())
-        text += c_text
-        text += "\n\n"
+            refs[item["id"]] = len(contexts) - 1
+
+    return contexts, refs
+
+# Build items part of the prompt: every commit message and every context is written once and items refer to them
+def formatVerifyItems(batch) -> str:
+    commits = {}
+    commit_refs = {}
+
+    for item in batch:
+        message = item.get("commit_message")
+        if message is None:
+            continue
+
+        key = item.get("commit_hash", message)
+        if key not in commits:
+            commits[key] = (f"C{len(commits) + 1}", message)
+        commit_refs[item["id"]] = commits[key][0]
+
+    contexts, context_refs = _mergeContexts(batch)
+
+    text = ""
+
+    if commits:
+        text += "==== COMMITS ====\n"
+        for ref, message in commits.values():
+            text += f"{ref}: {json.dumps(message.strip(), ensure_ascii=False)}\n"
+        text += "\n"
+
+    if contexts:
+        text += "==== CONTEXTS ====\n"
+        for idx, (file_name, lines) in enumerate(contexts):
+            text += f"X{idx + 1} file={file_name}\n" + "\n".join(lines) + "\n\n"
+
+    text += "==== ITEMS ====\n"
+    for item in batch:
+        _id = item["id"]
+        fields = [f"{k}={v}" for k, v in item.items() if k not in SHARED_FIELDS]
+        if _id in commit_refs:
+            fields.append(f"commit={commit_refs[_id]}")
+        if _id in context_refs:
+            fields.append(f"context=X{context_refs[_id] + 1}")
+
+        text += " ".join(fields) + "\n"
 
     return text
 
+def getVerifyPrompt(batch, filename):
+    return getPromptTemplate(filename) + formatVerifyItems(batch)
@@ -1,6 +1,10 @@
-from groq.types.chat.completion_create_params import ResponseFormatResponseFormatJsonSchema
+from typing import TYPE_CHECKING
 
-verifySecretsSchema: ResponseFormatResponseFormatJsonSchema = {
+# The type is only needed by type checkers, importing the SDK takes most of the startup time
+if TYPE_CHECKING:
+    from groq.types.chat.completion_create_params import ResponseFormatResponseFormatJsonSchema
+
+verifySecretsSchema: "ResponseFormatResponseFormatJsonSchema" = {
     "type": "json_schema",
     "json_schema": {
         "name": "SecretTriageList",
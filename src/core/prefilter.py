@@ -0,0 +1,176 @@
+from typing import List, Tuple
+
+import re
+
+from src.helpers.sre_helper import sre_constants, parse_pattern, REPEATS
+
+# Literals shorter than this hit almost every line, so such rules are cheaper to keep in the always-run bucket
+MIN_LITERAL_LENGTH = 3
+
+# Characters which are equal to ASCII letters only for case-insensitive regexes and are not lowered to them
+_CASE_FOLD_EXTRA = str.maketrans({"ı": "i", "ſ": "s"})
+
+# Lowercase text the same way as the literals of the prefilter are lowercased
+def fold_case(text: str) -> str:
+    text = text.lower()
+    if not text.isascii():
+        text = text.translate(_CASE_FOLD_EXTRA)
+
+    return text
+
+# Pick the more selective of two requirements (sets of literals, one of which must be present)
+def _better_requirement(a, b):
+    if a is None: return b
+    if b is None: return a
+
+    key_a = (min(len(s) for s in a), -len(a))
+    key_b = (min(len(s) for s in b), -len(b))
+
+    return b if key_b > key_a else a
+
+# Returns lowercased character, if the item always matches exactly this character up to case (a, [aA], (a))
+def _literal_char(op, av):
+    if op is sre_constants.LITERAL:
+        return fold_case(chr(av))
+
+    if op is sre_constants.IN:
+        chars = set()
+        for item_op, item_av in av:
+            if item_op is not sre_constants.LITERAL:
+                return None
+            chars.add(fold_case(chr(item_av)))
+        return chars.pop() if len(chars) == 1 else None
+
+    if op is sre_constants.SUBPATTERN and len(av[-1]) == 1:
+        return _literal_char(*av[-1][0])
+
+    return None
+
+# Walk parsed regex and return set of literals, one of which must occur in every match (or None)
+def _required_literals(parsed):
+    best = None
+    run = []
+
+    def flush():
+        nonlocal best
+        if run:
+            best = _better_requirement(best, {"".join(run)})
+            run.clear()
+
+    for op, av in parsed:
+        char = _literal_char(op, av)
+        if char is not None:
+            run.append(char)
+            continue
+
+        flush()
+        requirement = None
+
+        if op is sre_constants.SUBPATTERN:
+            requirement = _required_literals(av[-1])
+        elif op in REPEATS:
+            low, _, inner = av
+            if low >= 1:
+                requirement = _required_literals(inner)
+        elif op is sre_constants.BRANCH:
+            branches = [_required_literals(branch) for branch in av[1]]
+            if all(branch is not None for branch in branches):
+                requirement = set().union(*branches)
+
+        best = _better_requirement(best, requirement)
+
+    flush()
+    return best
+
+# Extract lowercased literals for a pattern. Returns None, if the rule must always be run
+def extract_literals(pattern: str, flags: int = 0):
+    parsed = parse_pattern(pattern, flags)
+    if parsed is None:
+        return None
+
+    requirement = _required_literals(parsed)
+    if requirement is None:
+        return None
+
+    literals = {fold_case(s) for s in requirement}
+    if any(not s.isascii() or len(s) < MIN_LITERAL_LENGTH for s in literals):
+        return None
+
+    return literals
+
+# Build regex out of a trie of literals. At every position it matches the longest literal starting there
+def _trie_to_pattern(node) -> str:
+    branches = [
+        re.escape(ch) + _trie_to_pattern(child)
+        for ch, child in sorted(node.items()) if ch
+    ]
+
+    if not branches:
+        return ""
+
+    terminal = "" in node
+    if len(branches) == 1 and not terminal:
+        return branches[0]
+
+    body = "(?:" + "|".join(branches) + ")"
+    return body + "?" if terminal else body
+
+class LiteralPrefilter:
+    def __init__(self, patterns: List[Tuple[str, int]]):
+        rules_by_literal = {}
+        always = []
+
+        for idx, (pattern, flags) in enumerate(patterns):
+            literals = extract_literals(pattern, flags)
+            if literals is None:
+                always.append(idx)
+                continue
+
+            for literal in literals:
+                rules_by_literal.setdefault(literal, []).append(idx)
+
+        self.always = tuple(always)
+
+        # Every literal also implies presence of all literals which are its prefixes
+        self.expand = {}
+        for literal in rules_by_literal:
+            indices = set()
+            for end in range(MIN_LITERAL_LENGTH, len(literal) + 1):
+                indices.update(rules_by_literal.get(literal[:end], ()))
+            self.expand[literal] = tuple(indices)
+
+        trie = {}
+        for literal in rules_by_literal:
+            node = trie
+            for ch in literal:
+                node = node.setdefault(ch, {})
+            node[""] = {}
+
+        # Lookahead lets one scan report literals which overlap each other
+        self.matcher = re.compile("(?=(" + _trie_to_pattern(trie) + "))") if trie else None
+
+    # Returns sorted indices of the patterns which can match the text
+    def candidates(self, text: str) -> List[int]:
+        if self.matcher is None:
+            return list(self.always)
+
+        found = set(self.matcher.findall(fold_case(text)))
+        if not found:
+            return list(self.always)
+
+        indices = set(self.always)
+        for literal in found:
+            indices.update(self.expand[literal])
+
+        return sorted(indices)
+
+    # Returns (position, literal) pairs found in the text, or None if positions can't be mapped back to the text
+    def locate(self, text: str):
+        if self.matcher is None:
+            return []
+
+        folded = fold_case(text)
+        if len(folded) != len(text):
+            return None
+
+        return [(m.start(), m.group(1)) for m in self.matcher.finditer(folded)]
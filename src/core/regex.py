@@ -1,13 +1,23 @@
 import os
+from bisect import bisect_right
 from typing import Tuple, List, Iterable
 
-import yaml, re
+import re
+import time
 
+from src.core.candidate import Candidate
+from src.core.rules import load_rule_set
+from src.core.safety import RuleGuard, search_windowed, DEFAULT_RULE_BUDGET, LINE_WINDOW
+from src.helpers.hashing_helper import files_digest
 from src.helpers.math_helper import shannon_entropy
+from src.helpers.pii_helper import validate_sensitive, ACCEPT, REJECT
 from src.helpers.regex_helper import detect_jwt, is_example_like, detect_dangerous_uri, \
     wordy_or_camel, compression_ratio
 from resources.common import JWT_NAMES
 
+SECRETS_RULES_PATH = os.path.join(os.path.dirname(__file__), "../../resources/rules-stable.yml")
+SENSITIVE_RULES_PATH = os.path.join(os.path.dirname(__file__), "../../resources/pii-stable.yml")
+
 # Helper function to build return value of "detect_secrets" function
 def build_secret(
         lineNum: int | None,
@@ -16,22 +26,24 @@ def build_secret(
         value: str,
         file_name: str,
         entropy: float,
-        context: list,
+        context_offset: int,
         commit,
         uri_detected,
-        kind):
-    return {
-        "kind": kind,
-        "id": _id,
-        "commit": commit,
-        "line": lineNum,
-        "rule": rule,
-        "value": value,
-        "file": file_name,
-        "entropy": entropy,
-        "context": context,
-        "uri_detected": uri_detected,
-    }
+        kind,
+        context_start: int | None = None):
+    return Candidate(
+        _id,
+        commit,
+        lineNum,
+        rule,
+        value,
+        file_name,
+        context_offset,
+        context_start,
+        kind=kind,
+        entropy=entropy,
+        uri_detected=uri_detected,
+    )
 
 def build_sensitive(
         lineNum: int | None,
@@ -39,18 +51,12 @@ def build_sensitive(
         rule: str,
         value: str,
         file_name: str,
-        context,
+        context_offset: int,
         commit,
+        context_start: int | None = None,
+        kind: str | None = None,
 ):
-    return {
-        "id": _id,
-        "commit": commit,
-        "line": lineNum,
-        "rule": rule,
-        "value": value,
-        "file": file_name,
-        "context": context,
-    }
+    return Candidate(_id, commit, lineNum, rule, value, file_name, context_offset, context_start, kind=kind)
 
 # Function which decides, whether a token should be sent to the LLM for detailed analysis
 def should_escalate(value: str, line: str, path: str, entropy: float, conf: str) -> bool:
@@ -79,63 +85,352 @@ def select_best_match(matches):
 
     return best
 
-def precompile_patterns(raw_patterns):
-    tmp = []
-
-    for p in raw_patterns:
-        pattern = p.get("pattern", {})
-        confidence = pattern.get("confidence").strip()
-        tmp.append((pattern["name"], re.compile(pattern["regex"]), confidence))
-
-    return tmp
+def build_hit(match, name, conf):
+    return {
+        "name": name,
+        "conf": conf,
+        "token": match.group(0),
+    }
 
-def match_line(line: str, rx, name, conf):
-    match = rx.search(line)
+# Long lines are searched in bounded windows (window 0 searches the whole line)
+def match_line(line: str, rx, name, conf, window: int = 0, positions=None):
+    match = search_windowed(rx, line, window, positions)
 
     if match:
-         return {
-            "name": name,
-            "conf": conf,
-            "token": match.group(0),
-         }
+         return build_hit(match, name, conf)
 
     return None
 
+# Map rules which can match the text to positions of their literals in it (None for rules without literals).
+# Rules are in the same order as "prefilter.candidates" returns them
+def locate_rules(text: str, prefilter):
+    located = prefilter.locate(text)
+    if located is None:
+        return dict.fromkeys(prefilter.candidates(text))
+
+    positions_by_rule = dict.fromkeys(prefilter.always)
+    for pos, literal in located:
+        for idx in prefilter.expand[literal]:
+            positions_by_rule.setdefault(idx, []).append(pos)
+
+    return dict(sorted(positions_by_rule.items()))
+
+# Add a run of a rule to the profiler stats: {rule name: [seconds, calls, hits]}
+def record_rule(stats, name, seconds: float, hits: int):
+    total = stats.get(name)
+    if total is None:
+        total = stats[name] = [0.0, 0, 0]
+
+    total[0] += seconds
+    total[1] += 1
+    total[2] += hits
+
+# Run only the patterns whose literals were found in the line by the prefilter.
+# With stats every rule run is timed (profiling), with guard long lines are searched in windows,
+# runs over long lines are checked against the time budget and quarantined rules are skipped
+def collect_hits(line: str, patterns, prefilter, stats=None, guard=None):
+    hits = []
+    window = 0
+    watched = False
+    quarantined = ()
+
+    if guard is not None:
+        window = guard.line_window
+        watched = guard.watches(len(line))
+        quarantined = guard.quarantined
+
+    # A long line is searched only around the literals of each rule
+    if 0 < window < len(line):
+        positions_by_rule = locate_rules(line, prefilter)
+    else:
+        positions_by_rule = dict.fromkeys(prefilter.candidates(line))
+
+    for idx, positions in positions_by_rule.items():
+        if idx in quarantined:
+            guard.skip()
+            continue
+
+        name, rx, conf = patterns[idx]
+
+        if stats is None and not watched:
+            match = match_line(line, rx, name, conf, window, positions)
+        else:
+            start = time.perf_counter()
+            match = match_line(line, rx, name, conf, window, positions)
+            seconds = time.perf_counter() - start
+
+            if stats is not None:
+                record_rule(stats, name, seconds, match is not None)
+            if watched:
+                guard.check(idx, name, seconds, len(line))
+
+        if match:
+            hits.append(match)
+
+    return hits
+
+# If a rule's literals were found in more than 1/DENSE_LINES_RATIO of the lines, it is run over the whole buffer
+DENSE_LINES_RATIO = 8
+
+# Collect hits for all lines at once: every rule runs over "\n"-joined lines instead of every line separately.
+# Returns {line index: hits} with hits in the same order as "collect_hits" would produce them.
+# With stats every rule run over the patch is timed (profiling). With guard lines longer than the window
+# are matched separately by "collect_hits" and every rule run is checked against the time budget
+def collect_patch_hits(texts: List[str], patterns, prefilter, traits, stats=None, guard=None):
+    if not texts:
+        return {}
+
+    long_hits = {}
+    quarantined = ()
+    watched = False
+
+    if guard is not None:
+        quarantined = guard.quarantined
+        watched = guard.budget > 0
+
+        window = guard.line_window
+        if window > 0 and any(len(text) > window for text in texts):
+            for line_idx, text in enumerate(texts):
+                if len(text) > window:
+                    long_hits[line_idx] = collect_hits(text, patterns, prefilter, stats, guard)
+            texts = ["" if line_idx in long_hits else text for line_idx, text in enumerate(texts)]
+
+    longest = max(len(text) for text in texts)
+
+    buffer = "\n".join(texts)
+
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text) + 1
+
+    # Map rules to the lines containing their literals (None means all lines)
+    located = prefilter.locate(buffer)
+    if located is None:
+        lines_by_rule = {idx: None for idx in prefilter.candidates(buffer)}
+    else:
+        lines_by_rule = {idx: None for idx in prefilter.always}
+        for pos, literal in located:
+            line_idx = bisect_right(starts, pos) - 1
+            for idx in prefilter.expand[literal]:
+                lines_by_rule.setdefault(idx, set()).add(line_idx)
+
+    hits_by_line = {}
+
+    for idx in sorted(lines_by_rule):
+        line_local, width = traits[idx]
+
+        # No line is long enough for the rule
+        if width > longest:
+            continue
+        if idx in quarantined:
+            guard.skip()
+            continue
+
+        name, rx, conf = patterns[idx]
+        lines = lines_by_rule[idx]
+        start_time = time.perf_counter() if stats is not None or watched else None
+        found = 0
+
+        # Sparse literal hits: check only the lines where literals were found
+        sparse = lines is not None and len(lines) * DENSE_LINES_RATIO < len(texts)
+
+        if sparse:
+            for line_idx in sorted(lines):
+                if line_local:
+                    start = starts[line_idx]
+                    match = rx.search(buffer, start, start + len(texts[line_idx]))
+                else:
+                    match = rx.search(texts[line_idx])
+
+                if match:
+                    hits_by_line.setdefault(line_idx, []).append((idx, build_hit(match, name, conf)))
+                    found += 1
+        elif line_local:
+            pos = starts[min(lines)] if lines else 0
+            while True:
+                match = rx.search(buffer, pos)
+                if match is None:
+                    break
+
+                line_idx = bisect_right(starts, match.start()) - 1
+                hits_by_line.setdefault(line_idx, []).append((idx, build_hit(match, name, conf)))
+                found += 1
+
+                # Only the first match in a line counts, as for "rx.search(line)"
+                if line_idx + 1 == len(starts):
+                    break
+                pos = starts[line_idx + 1]
+        else:
+            for line_idx in (range(len(texts)) if lines is None else sorted(lines)):
+                match = match_line(texts[line_idx], rx, name, conf)
+                if match:
+                    hits_by_line.setdefault(line_idx, []).append((idx, match))
+                    found += 1
+
+        if start_time is not None:
+            seconds = time.perf_counter() - start_time
+            if stats is not None:
+                record_rule(stats, name, seconds, found)
+            if watched:
+                guard.check(idx, name, seconds, len(buffer))
+
+    hits_by_line = {
+        line_idx: [match for _, match in sorted(hits, key=lambda h: h[0])]
+        for line_idx, hits in hits_by_line.items()
+        if line_idx not in long_hits
+    }
+    hits_by_line.update((line_idx, hits) for line_idx, hits in long_hits.items() if hits)
 
-class Regex:
-    def __init__(self):
-        self.last_id = 0
+    return hits_by_line
 
-        # Manage secrets database
-        secrets_file_path = os.path.join(os.path.dirname(__file__), "../../resources/rules-stable.yml")
-        with open(secrets_file_path, "r", encoding="utf-8") as f:
-            secrets_db = yaml.safe_load(f)
 
-        secrets_patterns_raw = secrets_db.get("patterns", [])
-        self.secrets_patterns_list = precompile_patterns(secrets_patterns_raw)
+class Regex:
+    def __init__(self, bound: int = 0, rule_budget: float = DEFAULT_RULE_BUDGET, line_window: int = LINE_WINDOW):
+        self.last_id = 0
+        self._secrets = None
+        self._sensitive = None
+        self.profiler = None
+
+        # Unbounded repeats of the risky rules are bounded by this count (0 keeps the rules as they are)
+        self.bound = bound
+        self.guards = {
+            mode: RuleGuard(rule_budget, line_window)
+            for mode in ("secrets", "sensitive")
+        }
+
+    # Constructor arguments, so a worker process can build the same Regex
+    def settings(self):
+        guard = self.guards["secrets"]
+        return {"bound": self.bound, "rule_budget": guard.budget, "line_window": guard.line_window}
+
+    # Regex of a new scan which shares the loaded rule sets (with the regexes compiled so far), but has its own
+    # ids, guards and profiler. Used by the daemon to start every job with warm rules
+    def fork(self):
+        regex = Regex(**self.settings())
+        regex._secrets = self._secrets
+        regex._sensitive = self._sensitive
+        return regex
+
+    # Compile every rule of the mode in advance instead of on the first use
+    def warm(self, mode: str):
+        rule_set = self.sensitive if mode == "sensitive" else self.secrets
+        for _ in rule_set.patterns:
+            pass
+
+    # Rule sets are loaded from the cached artifact on the first use, a run needs only the one of its mode
+    @property
+    def secrets(self):
+        if self._secrets is None:
+            self._secrets = load_rule_set(SECRETS_RULES_PATH, bound=self.bound)
+        return self._secrets
+
+    @property
+    def sensitive(self):
+        if self._sensitive is None:
+            self._sensitive = load_rule_set(SENSITIVE_RULES_PATH, bound=self.bound)
+        return self._sensitive
+
+    # Per-rule stats of the mode, None if profiling is off
+    def rule_stats(self, mode: str):
+        return None if self.profiler is None else self.profiler.rule_stats(mode)
+
+    # Lint results of the mode's rules with overruns and quarantined rules of the run
+    def safety_report(self, mode: str):
+        rule_set = self.sensitive if mode == "sensitive" else self.secrets
+
+        return {
+            "lint": rule_set.lint,
+            "bounded": rule_set.bounded,
+            **self.guards[mode].report(),
+        }
+
+    # Version of the detection results: the rules files and the settings which change what the rules match
+    def detection_version(self) -> str:
+        rules_version = files_digest(SECRETS_RULES_PATH, SENSITIVE_RULES_PATH)
+        return f"{rules_version}-b{self.bound}-w{self.guards['secrets'].line_window}"
+
+    # Whether a rule overran its budget or a quarantined rule was skipped since the last call
+    def take_tainted(self) -> bool:
+        return any([guard.take_tainted() for guard in self.guards.values()])
+
+    # Take overruns out of the guards (used to send worker process data to the parent)
+    def drain_guards(self):
+        return {mode: guard.drain() for mode, guard in self.guards.items()}
+
+    def merge_guards(self, state):
+        for mode, guard_state in state.items():
+            self.guards[mode].merge(guard_state)
+
+    @property
+    def secrets_patterns_list(self):
+        return self.secrets.patterns
+
+    @property
+    def secrets_prefilter(self):
+        return self.secrets.prefilter
+
+    @property
+    def secrets_traits(self):
+        return self.secrets.traits
+
+    @property
+    def sensitive_patterns_list(self):
+        return self.sensitive.patterns
+
+    @property
+    def sensitive_prefilter(self):
+        return self.sensitive.prefilter
+
+    @property
+    def sensitive_traits(self):
+        return self.sensitive.traits
+
+    def detect_secret(self, line: Tuple[int | None, str, int, int], file_name, commit):
+        # Iterate over patterns which passed the literal prefilter
+        hits = collect_hits(
+            line[1], self.secrets_patterns_list, self.secrets_prefilter, self.rule_stats("secrets"), self.guards["secrets"]
+        )
+        return self.build_secret_candidate(select_best_match(hits), line, file_name, commit)
+
+    # Whole-patch version of "detect_secret": returns candidates for all lines in lines order
+    def detect_secrets_in_lines(self, lines: List[Tuple[int | None, str, int, int]], file_name, commit):
+        hits_by_line = collect_patch_hits(
+            [line[1] for line in lines],
+            self.secrets_patterns_list,
+            self.secrets_prefilter,
+            self.secrets_traits,
+            self.rule_stats("secrets"),
+            self.guards["secrets"],
+        )
 
-        # Manage sensitive database
-        sensitive_file_path = os.path.join(os.path.dirname(__file__), "../../resources/pii-stable.yml")
-        with open(sensitive_file_path, "r", encoding="utf-8") as f:
-            sensitive_db = yaml.safe_load(f)
+        candidates = []
+        for line_idx in sorted(hits_by_line):
+            candidate = self.build_secret_candidate(
+                select_best_match(hits_by_line[line_idx]), lines[line_idx], file_name, commit
+            )
+            if candidate is not None:
+                candidates.append(candidate)
 
-        sensitive_patterns_raw = sensitive_db.get("patterns", [])
-        self.sensitive_patterns_list = precompile_patterns(sensitive_patterns_raw)
+        return candidates
 
-    def detect_secret(self, line: Tuple[int | None, str, List], file_name, commit):
-        # Iterate over all patterns
-        hits = []
+    def build_secret_candidate(self, best_match, line: Tuple[int | None, str, int, int], file_name, commit):
+        if best_match is None:
+            return None
 
-        for name, rx, conf in self.secrets_patterns_list:
-            match = match_line(line[1], rx, name, conf)
-            if match:
-                hits.append(match)
+        if self.profiler is not None:
+            with self.profiler.stage("escalation"):
+                candidate = self._build_secret_candidate(best_match, line, file_name, commit)
 
-        best_match = select_best_match(hits)
+            self.profiler.count("candidates", candidate is not None)
+            self.profiler.count("escalations", candidate is not None and candidate.kind == "LLM")
+            return candidate
 
-        if best_match is None:
-            return None
+        return self._build_secret_candidate(best_match, line, file_name, commit)
 
+    # Entropy, escalation heuristics and JWT check of the best match
+    def _build_secret_candidate(self, best_match, line: Tuple[int | None, str, int, int], file_name, commit):
         token = best_match["token"]
 
         _id = self.last_id
@@ -165,26 +460,65 @@ class Regex:
             value=token,
             file_name=file_name,
             entropy=entropy,
-            context=line[2],
+            context_offset=line[2],
+            context_start=line[3],
             uri_detected=uri_detected
         )
 
-    def detect_sensitive(self, line: Tuple[int | None, str, List], file_name, commit):
-        hits = []
-
-        for name, rx, conf in self.sensitive_patterns_list:
-            match = match_line(line[1], rx, name, conf)
-            if match:
-                hits.append(match)
+    def detect_sensitive(self, line: Tuple[int | None, str, int, int], file_name, commit):
+        hits = collect_hits(
+            line[1],
+            self.sensitive_patterns_list,
+            self.sensitive_prefilter,
+            self.rule_stats("sensitive"),
+            self.guards["sensitive"],
+        )
+        return self.build_sensitive_candidate(select_best_match(hits), line, file_name, commit)
+
+    # Whole-patch version of "detect_sensitive": returns candidates for all lines in lines order
+    def detect_sensitive_in_lines(self, lines: List[Tuple[int | None, str, int, int]], file_name, commit):
+        hits_by_line = collect_patch_hits(
+            [line[1] for line in lines],
+            self.sensitive_patterns_list,
+            self.sensitive_prefilter,
+            self.sensitive_traits,
+            self.rule_stats("sensitive"),
+            self.guards["sensitive"],
+        )
 
-        best_match = select_best_match(hits)
+        candidates = []
+        for line_idx in sorted(hits_by_line):
+            candidate = self.build_sensitive_candidate(
+                select_best_match(hits_by_line[line_idx]), lines[line_idx], file_name, commit
+            )
+            if candidate is not None:
+                candidates.append(candidate)
 
+        return candidates
 
+    def build_sensitive_candidate(self, best_match, line: Tuple[int | None, str, int, int], file_name, commit):
         if best_match is None:
             return None
 
+        if self.profiler is not None:
+            with self.profiler.stage("escalation"):
+                candidate = self._build_sensitive_candidate(best_match, line, file_name, commit)
+
+            self.profiler.count("candidates", candidate is not None)
+            self.profiler.count("escalations", candidate is not None and candidate.kind == "LLM")
+            return candidate
+
+        return self._build_sensitive_candidate(best_match, line, file_name, commit)
+
+    # Local validation of the best match: confident matches are reported right away, rejected ones are dropped,
+    # the others go to the LLM
+    def _build_sensitive_candidate(self, best_match, line: Tuple[int | None, str, int, int], file_name, commit):
         token = best_match["token"]
 
+        verdict = validate_sensitive(best_match["name"], token, line[1], file_name)
+        if verdict == REJECT:
+            return None
+
         _id = self.last_id
         self.last_id += 1
 
@@ -195,5 +529,7 @@ class Regex:
             value=token,
             file_name=file_name,
             commit=commit,
-            context=line[2],
+            context_offset=line[2],
+            context_start=line[3],
+            kind=("Instant" if verdict == ACCEPT else "LLM"),
         )
\ No newline at end of file
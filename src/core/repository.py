@@ -1,86 +1,458 @@
+import codecs
 import re
 import shutil
+import subprocess
 from hashlib import sha256
 import os.path
 from collections import deque
-
-from git import Repo, NULL_TREE
+from itertools import accumulate, chain, repeat
+from operator import add
 
 TMP_FOLDER = "../../seeker_tmp/"
 
-HUNK_HEADER_REGEX = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+# Hunk headers and runs of consecutive added lines, the only parts of a patch the parser stops at
+HUNK_OR_ADDED_REGEX = re.compile(rb"^(?:@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@[^\n]*|\+[^\n]*(?:\n\+[^\n]*)*)", re.M)
+
+# Diff backends: GitPython diff per commit or a single streaming "git log -p" process
+GITPYTHON_BACKEND = "gitpython"
+GIT_LOG_BACKEND = "git-log"
+
+# Separators of commit hash, message and patches in the "git log" stream
+_COMMIT_START = b"\x1e"
+_MESSAGE_END = b"\x1f"
+
+# Options which make "git log -p" and "git diff" produce the same patches as GitPython's
+# "parent.diff(commit, create_patch=True)"
+GIT_DIFF_ARGS = [
+    "-p",
+    "-M",
+    "--full-index",
+    "--no-color",
+    "--no-ext-diff",
+    "--no-textconv",
+]
+GIT_LOG_ARGS = [
+    *GIT_DIFF_ARGS,
+    "--diff-merges=first-parent",
+    "--format=%x1e%H%n%B%x1f",
+]
+
+# Remote repositories are cloned without blobs, the blobs of the scanned diffs are fetched on demand
+CLONE_FILTER = "blob:none"
+
+# Object id of a missing side of a diff and mode of submodule entries, whose ids are commits of other repositories
+_NULL_OID = b"0" * 40
+_GITLINK_MODE = b"160000"
+
+# Commit hash of the staged changes, which are scanned as a single commit
+STAGED_COMMIT = "staged"
+
+# Lines which end the extended header of a file diff and start its patch
+_PATCH_START = (b"@@", b"Binary files ", b"GIT binary patch")
+
+# Count of lines of the new file among the patch lines starting in [begin, end): all lines except removed ones
+# and "\ No newline at end of file" markers. The lines are counted in the buffer, without being split
+def _count_new_lines(patch: bytes, begin: int, end: int) -> int:
+    if begin >= end:
+        return 0
+
+    lines = patch.count(b"\n", begin, end)
+    skipped = patch.count(b"\n-", begin, end) + patch.count(b"\n\\", begin, end)
+    if patch.startswith((b"-", b"\\"), begin):
+        skipped += 1
+
+    return lines - skipped
 
-# Generator function that generates (number of line, line itself, context) triple.
-def iter_added_lines(patch: str):
+# Generator function that generates (number of line, line itself, offset of the line in the patch,
+# index of the first context line in patch) of the added lines of a raw patch. A run of added lines is decoded
+# and split at once, the lines between runs are only counted. Context is cut out of the patch by "context_lines"
+def iter_added_lines(patch: bytes):
     new_line = None
-    in_hunk = False
-    lines = patch.splitlines()
-
-    for i, line in enumerate(lines):
-        match = HUNK_HEADER_REGEX.match(line)
-        if match:
-            in_hunk = True
-            new_start = int(match.group(3))
-            new_line = new_start
+    pos = 0
+    index = 0
+
+    for match in HUNK_OR_ADDED_REGEX.finditer(patch):
+        start, end = match.span()
+        if start != pos:
+            if new_line is not None:
+                new_line += _count_new_lines(patch, pos, start)
+            index += patch.count(b"\n", pos, start)
+        pos = end + 1
+
+        if match.lastindex == 1:
+            new_line = int(match.group(1))
+            index += 1
+            continue
+
+        run = patch[start:end]
+        raw_lines = run.split(b"\n")
+
+        # Added lines before the first hunk header are not part of any hunk
+        if new_line is not None:
+            offsets = list(accumulate(map(add, map(len, raw_lines), repeat(1)), initial=start))
+            lines = run.decode("utf-8", errors="ignore").split("\n")
+
+            if b"\r" not in run and b"+++" not in run:
+                for i, line in enumerate(lines):
+                    yield new_line + i, line[1:], offsets[i], max(0, index + i - 3)
+                new_line += len(lines)
+            else:
+                # "+++" lines are skipped like file headers, "\r" of CRLF line ends is dropped
+                for i, line in enumerate(lines):
+                    if line.startswith("+++"):
+                        continue
+                    yield new_line, line[1:].removesuffix("\r"), offsets[i], max(0, index + i - 3)
+                    new_line += 1
+
+        index += len(raw_lines)
+
+# Span of the patch from 3 lines before the line at the offset to the end of the 3rd line after it
+def context_span(patch: bytes, offset: int):
+    begin = offset
+    for _ in range(3):
+        if begin == 0:
+            break
+        begin = patch.rfind(b"\n", 0, begin - 1) + 1
+
+    end = offset
+    for _ in range(4):
+        end = patch.find(b"\n", end)
+        if end == -1:
+            end = len(patch)
+            break
+        end += 1
+
+    return begin, end
+
+# Decoded lines of the patch around the line at the offset: 3 lines before it and 3 lines after it
+def context_lines(patch: bytes, offset: int) -> list:
+    begin, end = context_span(patch, offset)
+    lines = patch[begin:end].decode("utf-8", errors="ignore").split("\n")
+    if lines[-1] == "":
+        lines.pop()
+
+    return [line[:-1] if line.endswith("\r") else line for line in lines]
+
+# Generator function that yields {file, patch} of every diff of the commit, patch is the raw bytes of the diff.
+# Raw diffs are released one by one
+def iter_commit_diffs(commit):
+    from git import NULL_TREE
+
+    # Retrieve changes
+    if commit.parents:
+        diffs = commit.parents[0].diff(commit, create_patch=True)
+    else:
+        diffs = commit.diff(NULL_TREE, create_patch=True)
+
+    diffs.reverse()
+    while diffs:
+        d = diffs.pop()
+        yield {
+            "file": d.b_path,
+            "patch": d.diff
+        }
+
+# Path from a diff header line, unquoting C-style quoted paths. "/dev/null" becomes None
+def _parse_diff_path(raw: bytes, prefix: bytes):
+    raw = raw.rstrip(b"\n").rstrip(b"\t")
+    if raw.startswith(b'"') and raw.endswith(b'"'):
+        raw = codecs.escape_decode(raw[1:-1])[0]
+
+    if raw == b"/dev/null":
+        return None
+
+    if raw.startswith(prefix):
+        raw = raw[len(prefix):]
+
+    return raw.decode("utf-8", errors="ignore")
+
+# Shape a diff collected from "git log" stream the same way as "iter_commit_diffs" does
+def _build_git_log_diff(header, patch):
+    b_path = None
+    deleted = False
+
+    for line in header:
+        if line.startswith(b"+++ "):
+            return {
+                "file": _parse_diff_path(line[4:], b"b/"),
+                "patch": b"".join(patch or ())
+            }
+        if line.startswith(b"rename to ") or line.startswith(b"copy to "):
+            b_path = _parse_diff_path(line.split(b" to ", 1)[1], b"")
+        elif line.startswith(b"deleted file mode"):
+            deleted = True
+
+    # Binary, mode-only and rename-only diffs have no "+++" line
+    if b_path is None and not deleted:
+        first = header[0].rstrip(b"\n")
+        if b" b/" in first:
+            b_path = _parse_diff_path(first.rsplit(b" b/", 1)[1], b"")
+
+    return {
+        "file": None if deleted else b_path,
+        "patch": b"".join(patch or ())
+    }
+
+# Parse "git log -p" output stream into {hash, message, diffs} commits, one commit at a time
+def parse_git_log_stream(stream):
+    commit = None
+    message = None
+    header = None
+    patch = None
+
+    def flush_diff():
+        if header is not None:
+            commit["diffs"].append(_build_git_log_diff(header, patch))
+
+    for line in stream:
+        if line.startswith(_COMMIT_START):
+            if commit is not None:
+                flush_diff()
+                yield commit
+
+            commit = {
+                "hash": line[1:].strip().decode("ascii"),
+                "message": None,
+                "diffs": [],
+            }
+            message = []
+            header = None
             continue
 
-        if not in_hunk:
+        if commit is None:
             continue
 
-        if line.startswith("+") and not line.startswith("+++"):
-            start = max(0, i - 3)
-            end = min(len(lines), i + 4)
-            yield new_line, line[1:], lines[start:end]
-            new_line += 1
-        elif line.startswith("-") or line.startswith("+"):
-            pass
+        if message is not None:
+            end = line.find(_MESSAGE_END)
+            if end == -1:
+                message.append(line)
+                continue
+
+            message.append(line[:end])
+            commit["message"] = b"".join(message).decode("utf-8", errors="ignore").strip()
+            message = None
+            continue
+
+        if line.startswith(b"diff --git ") or line.startswith(b"diff --cc "):
+            flush_diff()
+            header = [line]
+            patch = None
+        elif header is None:
+            continue
+        elif patch is None:
+            if line.startswith(_PATCH_START):
+                patch = [line]
+            else:
+                header.append(line)
         else:
-            if not line.startswith("\\"):
-                new_line += 1
+            patch.append(line)
+
+    if commit is not None:
+        flush_diff()
+        yield commit
 
+# Directory of the clone of a remote repository in seeker_tmp: its name and a hash of the URL, so repositories
+# of different owners with the same name get clones of their own
+def get_clone_name(url: str) -> str:
+    url = url.rstrip("/")
+    repo_name = os.path.basename(re.sub(r"\.git$", "", url))
+    return f"{repo_name}-{sha256(url.encode('utf-8')).hexdigest()[:16]}"
+
+# Local repository or a clone of a remote one in seeker_tmp. n is the count of commits the scan needs,
+# remote repositories are cloned only as deep as that
 class Repository:
-    def __init__(self, url_or_path: str):
+    def __init__(self, url_or_path: str, n: int | None = None):
         tmp_folder = os.path.abspath(TMP_FOLDER)
         os.makedirs(tmp_folder, exist_ok=True)
 
+        # GitPython is imported and the repository is opened on first use, "git" subprocesses need only the path
+        self._repo = None
+
         if os.path.exists(url_or_path):
-            self.repo = Repo(url_or_path)
+            self.path = os.path.abspath(url_or_path)
             self.repo_name = os.path.basename(os.path.normpath(url_or_path))
+            self.key = self.path
+            self.remote = False
             return
 
+        # Key identifies the repository in persistent stores
+        self.key = url_or_path
         self.repo_name = os.path.basename(re.sub(r"\.git$", "", url_or_path.rstrip("/")))
-        repo_path = os.path.join(tmp_folder, self.repo_name)
+        self.path = os.path.join(tmp_folder, get_clone_name(url_or_path))
+        self.remote = True
 
-        if os.path.exists(repo_path):
-            self.repo = Repo(repo_path)
-            self.repo.remotes.origin.fetch(prune=True)
+        if os.path.exists(self.path):
+            self.fetch(n)
         else:
-            self.repo = Repo.clone_from(url_or_path, repo_path)
+            self.clone(url_or_path, n)
 
-    # Returns last n commits from the local/remote repository
-    def get_last_commits(self, n: int):
-        commits = []
+    @property
+    def repo(self):
+        if self._repo is None:
+            from git import Repo
+            self._repo = Repo(self.path)
 
-        for commit in list(self.repo.iter_commits(all=True, max_count=n)):
-            # Retrieve changes
-            if commit.parents:
-                diffs = commit.parents[0].diff(commit, create_patch=True)
-            else:
-                diffs = commit.diff(NULL_TREE, create_patch=True)
+        return self._repo
+
+    def _git(self, *args, **kwargs) -> bytes:
+        return subprocess.run(["git", *args], cwd=self.path, stdout=subprocess.PIPE, check=True, **kwargs).stdout
+
+    # Blob-less clone without a working tree. With n only n + 1 commits of every branch are cloned,
+    # the extra one is the parent the diff of the oldest scanned commit needs
+    def clone(self, url: str, n: int | None):
+        cmd = ["git", "clone", "--quiet", "--no-checkout", f"--filter={CLONE_FILTER}"]
+        if n is not None:
+            cmd += [f"--depth={n + 1}", "--no-single-branch"]
+
+        subprocess.run([*cmd, url, self.path], check=True)
+
+    # Update the reused clone. A shallow clone is fetched as deep as n commits need, or the whole history without n
+    def fetch(self, n: int | None):
+        cmd = ["fetch", "--quiet", "--prune"]
+        if self.is_shallow():
+            cmd.append("--unshallow" if n is None else f"--depth={n + 1}")
+
+        self._git(*cmd)
+
+    def is_shallow(self) -> bool:
+        return os.path.exists(os.path.join(self.path, ".git", "shallow"))
+
+    # Commits of a shallow clone whose parents were not fetched
+    def shallow_commits(self) -> set:
+        try:
+            with open(os.path.join(self.path, ".git", "shallow"), "rb") as f:
+                return set(f.read().split())
+        except FileNotFoundError:
+            return set()
+
+    def is_partial(self) -> bool:
+        return subprocess.run(
+            ["git", "config", "--get", "remote.origin.promisor"], cwd=self.path, stdout=subprocess.PIPE
+        ).stdout.strip() == b"true"
+
+    # Deepen a shallow clone until none of the commits to scan is at the shallow boundary: a commit without
+    # its parent would be diffed against the empty tree, as if all of its files were added. Every step is twice deeper
+    def ensure_history(self, n: int | None, rev: str | None = None):
+        step = n or 1
+
+        while self.is_shallow():
+            if n is None:
+                self._git("fetch", "--quiet", "--unshallow")
+                return
+
+            boundary = self.shallow_commits()
+            try:
+                listed = self._git("rev-list", rev or "--all", f"--max-count={n}", stderr=subprocess.DEVNULL).split()
+            except subprocess.CalledProcessError:
+                # Revisions of the range are beyond the fetched history
+                listed = boundary
+            if boundary.isdisjoint(listed):
+                return
 
-            # Collect all useful information in commit_data
-            commit_data = {
+            self._git("fetch", "--quiet", f"--deepen={step}")
+            if self.shallow_commits() == boundary:
+                return
+            step *= 2
+
+    # Fetch the blobs of all files changed by the commits to scan in one request. Diffs of a blob-less clone
+    # would otherwise fetch them one by one. Blobs which are present are not downloaded again and if the server
+    # refuses the request, diffs fall back to fetching blobs on demand
+    def prefetch_blobs(self, n: int | None, rev: str | None = None):
+        cmd = ["log", rev or "--all", "--raw", "--no-abbrev", "--no-renames", "--diff-merges=first-parent", "--format="]
+        if n is not None:
+            cmd.append(f"--max-count={n}")
+        if rev:
+            cmd.append("--")
+
+        oids = set()
+        for line in self._git(*cmd).splitlines():
+            if not line.startswith(b":"):
+                continue
+
+            old_mode, new_mode, old, new = line[1:].split(b"\t", 1)[0].split()[:4]
+            for mode, oid in ((old_mode, old), (new_mode, new)):
+                if mode != _GITLINK_MODE and oid != _NULL_OID:
+                    oids.add(oid)
+
+        if not oids:
+            return
+
+        subprocess.run(
+            [
+                "git", "-c", "fetch.negotiationAlgorithm=noop", "fetch", "--quiet", "--no-tags", "--no-write-fetch-head",
+                "--recurse-submodules=no", f"--filter={CLONE_FILTER}", "--stdin", "origin",
+            ],
+            cwd=self.path,
+            input=b"\n".join(sorted(oids)) + b"\n",
+        )
+
+    # Make sure a clone of a remote repository has the history and the blobs the scan of n commits needs
+    def prepare(self, n: int | None, rev: str | None = None):
+        if not self.remote:
+            return
+
+        self.ensure_history(n, rev)
+        if self.is_partial():
+            self.prefetch_blobs(n, rev)
+
+    # Lazily yields last n commits from the local/remote repository, of all branches or of the revision range
+    # (e.g. "main..feature"). "diffs" of every commit is an iterator, so only one commit's patches are held in memory
+    def iter_commits(self, n: int | None, backend: str = GITPYTHON_BACKEND, rev: str | None = None):
+        self.prepare(n, rev)
+
+        if backend == GIT_LOG_BACKEND:
+            yield from self.iter_commits_git_log(n, rev)
+            return
+
+        commits = self.repo.iter_commits(rev, max_count=n) if rev else self.repo.iter_commits(all=True, max_count=n)
+        for commit in commits:
+            yield {
                 "hash": commit.hexsha,
                 "message": commit.message.strip(),
-                "diffs": [
-                    {
-                        "file": d.b_path,
-                        "patch": d.diff.decode("utf-8", errors="ignore")
-                    }
-                    for d in diffs
-                ]
+                "diffs": iter_commit_diffs(commit),
             }
 
-            commits.append(commit_data)
+    # Same as "iter_commits", but all commits are read from one "git log -p" process instead of a git call per commit
+    def iter_commits_git_log(self, n: int | None, rev: str | None = None):
+        cmd = ["git", "-c", "core.quotepath=off", "log", rev or "--all", *GIT_LOG_ARGS]
+        if n is not None:
+            cmd.append(f"--max-count={n}")
+        if rev:
+            cmd.append("--")
+
+        yield from self._iter_git_stream(cmd)
+
+    # Yields the staged changes (the index against HEAD, what is about to be committed) as a single commit.
+    # Meant for pre-commit hooks, GitPython is not needed
+    def iter_staged(self):
+        cmd = ["git", "-c", "core.quotepath=off", "diff", "--cached", *GIT_DIFF_ARGS]
+        header = [_COMMIT_START + STAGED_COMMIT.encode("ascii") + b"\n", _MESSAGE_END + b"\n"]
 
-        return commits
+        yield from self._iter_git_stream(cmd, header)
+
+    # Commits parsed from the output of the git command, the header lines are parsed before the output
+    def _iter_git_stream(self, cmd, header=()):
+        proc = subprocess.Popen(cmd, cwd=self.path, stdout=subprocess.PIPE)
+
+        # git is killed only if the stream is left early, after a full read it may still be exiting
+        try:
+            for commit in parse_git_log_stream(chain(header, proc.stdout)):
+                yield {**commit, "diffs": iter(commit["diffs"])}
+        except BaseException:
+            proc.stdout.close()
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+            raise
+
+        proc.stdout.close()
+        proc.wait()
+        if proc.returncode != 0:
+            raise RuntimeError(f"{' '.join(cmd)} exited with code {proc.returncode}")
+
+    # Returns last n commits from the local/remote repository
+    def get_last_commits(self, n: int, backend: str = GITPYTHON_BACKEND):
+        return [
+            {**commit, "diffs": list(commit["diffs"])}
+            for commit in self.iter_commits(n, backend)
+        ]
@@ -0,0 +1,123 @@
+import os
+import pickle
+import re
+import tempfile
+from typing import List, Tuple
+
+from src.core.prefilter import LiteralPrefilter
+from src.core.repository import TMP_FOLDER
+from src.core.safety import lint_pattern, bound_repeats
+from src.helpers.sre_helper import is_line_local, min_width
+from src.helpers.hashing_helper import files_digest
+
+# Bump when the layout of the artifact or the way it is derived from the rules changes
+ARTIFACT_VERSION = 2
+
+RULES_CACHE_FOLDER = "rules"
+
+# Sequence of (name, compiled regex, confidence) rules. A regex is compiled on the first access,
+# so rules which never pass the literal prefilter are never compiled
+class LazyPatterns:
+    def __init__(self, rules: List[Tuple[str, str, str]]):
+        self.rules = rules
+        self.compiled = [None] * len(rules)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def __getitem__(self, idx):
+        compiled = self.compiled[idx]
+        if compiled is None:
+            name, pattern, confidence = self.rules[idx]
+            compiled = self.compiled[idx] = (name, re.compile(pattern), confidence)
+
+        return compiled
+
+    def __iter__(self):
+        return (self[idx] for idx in range(len(self.rules)))
+
+    # Compiled regexes are not stored in the artifact
+    def __getstate__(self):
+        return {"rules": self.rules}
+
+    def __setstate__(self, state):
+        self.__init__(state["rules"])
+
+# Rules of one mode with everything derived from them at load time.
+# Risky rules are linted and, if bound is set, their unbounded repeats are bounded
+class RuleSet:
+    def __init__(self, rules: List[Tuple[str, str, str]], bound: int = 0):
+        self.lint = {}
+        self.bounded = []
+
+        checked = []
+        for name, pattern, confidence in rules:
+            issues = lint_pattern(pattern)
+            if issues:
+                self.lint[name] = issues
+
+                if bound > 0:
+                    bounded = bound_repeats(pattern, bound)
+                    if bounded != pattern:
+                        self.bounded.append(name)
+                        pattern = bounded
+
+            checked.append((name, pattern, confidence))
+
+        rules = checked
+        self.patterns = LazyPatterns(rules)
+        self.prefilter = LiteralPrefilter([(pattern, 0) for _, pattern, _ in rules])
+        # Per-rule (line locality, minimal match width) pairs used by the whole-patch engine
+        self.traits = [(is_line_local(pattern), min_width(pattern)) for _, pattern, _ in rules]
+
+# YAML is parsed only when the artifact is rebuilt, so the import is deferred until then
+def read_rules(path: str) -> List[Tuple[str, str, str]]:
+    import yaml
+
+    # LibYAML loader is several times faster on the big rules files, pure python one is the fallback
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(path, "r", encoding="utf-8") as f:
+        db = yaml.load(f, Loader=loader)
+
+    rules = []
+    for p in db.get("patterns", []):
+        pattern = p.get("pattern", {})
+        rules.append((pattern["name"], pattern["regex"], pattern.get("confidence").strip()))
+
+    return rules
+
+def get_artifact_path(rules_path: str, cache_dir: str | None = None, bound: int = 0) -> str:
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.abspath(TMP_FOLDER), RULES_CACHE_FOLDER)
+
+    name = os.path.splitext(os.path.basename(rules_path))[0]
+    return os.path.join(cache_dir, f"{name}-{files_digest(rules_path)}-b{bound}-v{ARTIFACT_VERSION}.pickle")
+
+# Write the artifact through a temporary file, so concurrent runs never read a half-written one
+def save_artifact(path: str, rule_set: RuleSet):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(rule_set, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+# Load rule set from the artifact built for the current contents of the rules file, build it on a miss
+def load_rule_set(rules_path: str, cache_dir: str | None = None, bound: int = 0) -> RuleSet:
+    path = get_artifact_path(rules_path, cache_dir, bound)
+
+    try:
+        with open(path, "rb") as f:
+            rule_set = pickle.load(f)
+        if isinstance(rule_set, RuleSet):
+            return rule_set
+    except Exception:
+        pass
+
+    rule_set = RuleSet(read_rules(rules_path), bound)
+    save_artifact(path, rule_set)
+    return rule_set
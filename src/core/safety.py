@@ -0,0 +1,294 @@
+from typing import List
+
+from src.helpers.sre_helper import sre_constants, parse_pattern, REPEATS
+
+# Lines longer than this are matched in overlapping windows, so a rule never runs over a megabyte-long line
+LINE_WINDOW = 4096
+WINDOW_OVERLAP = 512
+
+# Rule runs over shorter texts are too cheap to be timed (the linter catches exponential patterns)
+TIMED_TEXT_LENGTH = 256
+
+# Seconds one rule may spend on one line (or one patch in the patch engine) and count of overruns
+# after which the rule is quarantined for the rest of the run
+DEFAULT_RULE_BUDGET = 0.5
+QUARANTINE_OVERRUNS = 3
+
+# Count of overruns kept for the report
+MAX_REPORTED_OVERRUNS = 100
+
+# Lint issues
+NESTED_QUANTIFIER = "nested_quantifier"
+OVERLAPPING_REPEATS = "overlapping_repeats"
+LEADING_UNBOUNDED = "leading_unbounded"
+UNBOUNDED_ANY = "unbounded_any"
+
+# Characters used to compare character sets of the adjacent repeats
+_SAMPLE = frozenset(range(128))
+
+_CATEGORY_CHARS = {
+    sre_constants.CATEGORY_DIGIT: frozenset(c for c in _SAMPLE if chr(c).isdigit()),
+    sre_constants.CATEGORY_WORD: frozenset(c for c in _SAMPLE if chr(c).isalnum() or chr(c) == "_"),
+    sre_constants.CATEGORY_SPACE: frozenset(c for c in _SAMPLE if chr(c).isspace()),
+}
+_CATEGORY_CHARS.update({
+    sre_constants.CATEGORY_NOT_DIGIT: _SAMPLE - _CATEGORY_CHARS[sre_constants.CATEGORY_DIGIT],
+    sre_constants.CATEGORY_NOT_WORD: _SAMPLE - _CATEGORY_CHARS[sre_constants.CATEGORY_WORD],
+    sre_constants.CATEGORY_NOT_SPACE: _SAMPLE - _CATEGORY_CHARS[sre_constants.CATEGORY_SPACE],
+})
+
+# ASCII characters matched by a single-character item, None if the item is not a single character
+def _item_chars(op, av):
+    if op is sre_constants.LITERAL:
+        return frozenset((av,))
+    if op is sre_constants.NOT_LITERAL:
+        return _SAMPLE - {av}
+    if op is sre_constants.ANY:
+        return _SAMPLE - {10}
+    if op is not sre_constants.IN:
+        return None
+
+    chars = set()
+    negate = False
+    for item_op, item_av in av:
+        if item_op is sre_constants.NEGATE:
+            negate = True
+        elif item_op is sre_constants.LITERAL:
+            chars.add(item_av)
+        elif item_op is sre_constants.RANGE:
+            chars.update(range(item_av[0], min(item_av[1], 127) + 1))
+        elif item_op is sre_constants.CATEGORY:
+            chars.update(_CATEGORY_CHARS.get(item_av, _SAMPLE))
+        else:
+            chars.update(_SAMPLE)
+
+    return frozenset(_SAMPLE - chars if negate else chars)
+
+# Characters of the repeated item, if the item is an unbounded repeat of a single character
+def _unbounded_chars(op, av):
+    if op not in REPEATS or av[1] != sre_constants.MAXREPEAT or len(av[2]) != 1:
+        return None
+    return _item_chars(*av[2][0])
+
+def _has_repeat(parsed) -> bool:
+    for op, av in parsed:
+        if op in REPEATS and av[1] > 1:
+            return True
+        if op is sre_constants.SUBPATTERN and _has_repeat(av[-1]):
+            return True
+        if op is sre_constants.BRANCH and any(_has_repeat(branch) for branch in av[1]):
+            return True
+        if op in REPEATS and _has_repeat(av[2]):
+            return True
+
+    return False
+
+def _lint(parsed, issues: set, top: bool):
+    items = list(parsed)
+    previous = None
+
+    for pos, (op, av) in enumerate(items):
+        if op in REPEATS:
+            _, high, inner = av
+            if high == sre_constants.MAXREPEAT and _has_repeat(inner):
+                issues.add(NESTED_QUANTIFIER)
+            _lint(inner, issues, False)
+        elif op is sre_constants.SUBPATTERN:
+            _lint(av[-1], issues, False)
+        elif op is sre_constants.BRANCH:
+            for branch in av[1]:
+                _lint(branch, issues, False)
+
+        chars = _unbounded_chars(op, av)
+        if chars is not None:
+            if previous is not None and previous & chars:
+                issues.add(OVERLAPPING_REPEATS)
+            if top and pos == 0:
+                issues.add(LEADING_UNBOUNDED)
+            if av[2][0][0] is sre_constants.ANY and (not top or pos + 1 < len(items)):
+                issues.add(UNBOUNDED_ANY)
+
+        previous = chars
+
+# Find constructs which can make matching slow on long lines:
+#  - nested_quantifier: unbounded repeat of something repeated, e.g. "(\w+\s?)*" (exponential backtracking)
+#  - overlapping_repeats: adjacent unbounded repeats with common characters, e.g. "[a-z]+[a-z0-9]+" (quadratic)
+#  - leading_unbounded: pattern starts with an unbounded repeat, e.g. "[0-9a-z._-]+.compute", so every
+#    start position rescans the same run of characters (quadratic on long runs)
+#  - unbounded_any: ".*" or ".+" followed by something else, it backtracks from the end of the line
+def lint_pattern(pattern: str, flags: int = 0) -> List[str]:
+    parsed = parse_pattern(pattern, flags)
+    if parsed is None:
+        return []
+
+    issues = set()
+    _lint(parsed, issues, True)
+    return sorted(issues)
+
+# Rewrite unbounded quantifiers ("*", "+", "{n,}") into bounded ones ("{0,limit}", "{1,limit}", "{n,limit}").
+# Possessive and lazy suffixes are kept. Returns the pattern unchanged, if the rewritten one doesn't compile
+def bound_repeats(pattern: str, limit: int) -> str:
+    out = []
+    i = 0
+    in_class = False
+    after_quantifier = False
+
+    while i < len(pattern):
+        c = pattern[i]
+
+        if c == "\\":
+            out.append(pattern[i:i + 2])
+            i += 2
+            after_quantifier = False
+            continue
+
+        if in_class:
+            out.append(c)
+            in_class = c != "]"
+            i += 1
+            continue
+
+        if c == "[":
+            # "]" right after "[" or "[^" is a literal
+            end = i + 1
+            if end < len(pattern) and pattern[end] == "^":
+                end += 1
+            if end < len(pattern) and pattern[end] == "]":
+                end += 1
+            out.append(pattern[i:end])
+            i = end
+            in_class = True
+            after_quantifier = False
+            continue
+
+        if c in "*+" and not after_quantifier:
+            out.append(f"{{{0 if c == '*' else 1},{limit}}}")
+            after_quantifier = True
+            i += 1
+            continue
+
+        if c == "{":
+            end = pattern.find("}", i)
+            body = pattern[i + 1:end] if end != -1 else ""
+            low, comma, high = body.partition(",")
+            if end != -1 and low.isdigit() and (high.isdigit() or not high):
+                if comma and not high:
+                    body = f"{low},{max(int(low), limit)}"
+                out.append("{" + body + "}")
+                after_quantifier = True
+                i = end + 1
+                continue
+
+        out.append(c)
+        after_quantifier = c in "*+?" and not after_quantifier
+        i += 1
+
+    bounded = "".join(out)
+    return bounded if parse_pattern(bounded) is not None else pattern
+
+# Windows of the text to search: around the given literal positions (a match contains one of its rule's
+# literals) or sliding overlapping windows over the whole text
+def iter_windows(length: int, window: int, positions=None):
+    if positions is None:
+        step = max(1, window - WINDOW_OVERLAP)
+        for start in range(0, length, step):
+            yield start, min(length, start + window)
+            if start + window >= length:
+                return
+        return
+
+    half = window // 2
+    current = None
+
+    for pos in sorted(positions):
+        start, end = max(0, pos - half), min(length, pos + half)
+
+        # Close literals share a window, as long as it stays within two window lengths
+        if current is not None and start <= current[1] and end - current[0] <= 2 * window:
+            current = (current[0], end)
+            continue
+
+        if current is not None:
+            yield current
+        current = (start, end)
+
+    if current is not None:
+        yield current
+
+# Search the text in bounded windows. Texts up to the window are searched as is
+def search_windowed(rx, text: str, window: int, positions=None):
+    if window <= 0 or len(text) <= window:
+        return rx.search(text)
+
+    for start, end in iter_windows(len(text), window, positions):
+        match = rx.search(text, start, end)
+        if match is not None:
+            return match
+
+    return None
+
+# Per-mode time budget of the rules. Python regexes can't be interrupted, so a slow run is finished,
+# reported as an overrun, and a rule with too many overruns is not run anymore
+class RuleGuard:
+    def __init__(
+            self,
+            budget: float = DEFAULT_RULE_BUDGET,
+            line_window: int = LINE_WINDOW,
+            max_overruns: int = QUARANTINE_OVERRUNS,
+    ):
+        self.budget = budget
+        self.line_window = line_window
+        self.max_overruns = max_overruns
+        self.overruns = []
+        self.counts = {}
+        self.quarantined = set()
+        self.quarantined_names = set()
+        # Set when a rule overran the budget or a quarantined rule was skipped: the results are incomplete
+        self.tainted = False
+
+    # Whether rule runs over the text are timed
+    def watches(self, text_length: int) -> bool:
+        return self.budget > 0 and text_length >= TIMED_TEXT_LENGTH
+
+    def check(self, idx: int, name: str, seconds: float, text_length: int):
+        if seconds <= self.budget or self.budget <= 0:
+            return
+
+        self.tainted = True
+        self.overruns.append({"rule": name, "seconds": round(seconds, 4), "text_length": text_length})
+        self.counts[idx] = self.counts.get(idx, 0) + 1
+
+        if self.counts[idx] >= self.max_overruns:
+            self.quarantined.add(idx)
+            self.quarantined_names.add(name)
+
+    # A quarantined rule was not run over the text
+    def skip(self):
+        self.tainted = True
+
+    # Whether results since the last call are incomplete
+    def take_tainted(self) -> bool:
+        tainted = self.tainted
+        self.tainted = False
+        return tainted
+
+    # Take overruns out of the guard (used to send worker process data to the parent)
+    def drain(self) -> dict:
+        state = {
+            "overruns": self.overruns,
+            "quarantined": sorted(self.quarantined_names),
+            "tainted": self.take_tainted(),
+        }
+        self.overruns = []
+        return state
+
+    def merge(self, state: dict):
+        self.overruns.extend(state["overruns"])
+        self.quarantined_names.update(state["quarantined"])
+
+    def report(self) -> dict:
+        return {
+            "overruns": len(self.overruns),
+            "slowest": sorted(self.overruns, key=lambda o: o["seconds"], reverse=True)[:MAX_REPORTED_OVERRUNS],
+            "quarantined": sorted(self.quarantined_names),
+        }
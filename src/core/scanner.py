@@ -0,0 +1,238 @@
+
+from src.core.candidate import CommitTable
+from src.core.classifier import SKIP, DOWNGRADE
+from src.core.regex import Regex
+from src.core.repository import iter_added_lines
+from src.helpers.parallel_helper import imap_ordered
+from src.helpers.profile_helper import Profiler
+
+SECRETS_MODE = "secrets"
+SENSITIVE_MODE = "sensitive"
+# Both rule sets over the same parsed lines, candidates are routed to the LLM stage of their category
+ALL_MODE = "all"
+
+# Categories of findings every mode looks for
+MODE_CATEGORIES = {
+    SECRETS_MODE: (SECRETS_MODE,),
+    SENSITIVE_MODE: (SENSITIVE_MODE,),
+    ALL_MODE: (SECRETS_MODE, SENSITIVE_MODE),
+}
+
+# "line" runs all rules line by line, "patch" runs every rule once over all added lines of a diff
+LINE_ENGINE = "line"
+PATCH_ENGINE = "patch"
+
+# Count of diffs queued per worker process
+PENDING_PER_WORKER = 4
+
+# Rule set of a worker process. Forked workers inherit the parent's one, spawned workers build their own once
+_worker_regex = None
+
+# Run heuristic detection over added lines of a single diff. Returns candidates in lines order
+def detect_diff(regex, diff, commit, mode: str, engine: str = LINE_ENGINE):
+    if regex.profiler is not None:
+        return profile_detect_diff(regex, diff, commit, mode, engine)
+
+    return detect_lines(regex, iter_added_lines(diff["patch"]), diff, commit, mode, engine)
+
+# "detect_diff" which times parsing and detection separately
+def profile_detect_diff(regex, diff, commit, mode: str, engine: str = LINE_ENGINE):
+    profiler = regex.profiler
+
+    with profiler.stage("parse"):
+        lines = list(iter_added_lines(diff["patch"]))
+
+    profiler.count("diffs")
+    profiler.count("lines", len(lines))
+
+    with profiler.stage("detect"):
+        return detect_lines(regex, lines, diff, commit, mode, engine)
+
+def detect_lines(regex, lines, diff, commit, mode: str, engine: str = LINE_ENGINE):
+    if mode == ALL_MODE:
+        return detect_lines_all(regex, lines, diff, commit, engine)
+
+    if engine == PATCH_ENGINE:
+        lines = list(lines)
+        if mode == SENSITIVE_MODE:
+            candidates = regex.detect_sensitive_in_lines(lines, diff["file"], commit)
+        else:
+            candidates = regex.detect_secrets_in_lines(lines, diff["file"], commit)
+        return tag_candidates(candidates, mode)
+
+    detect = regex.detect_sensitive if mode == SENSITIVE_MODE else regex.detect_secret
+    candidates = []
+
+    for line in lines:
+        candidate = detect(line, diff["file"], commit)
+        if candidate is not None:
+            candidates.append(candidate)
+
+    return tag_candidates(candidates, mode)
+
+# "detect_lines" of both categories: every added line is parsed once and matched by both rule sets.
+# The line engine keeps candidates in lines order, the patch engine returns secrets ones first
+def detect_lines_all(regex, lines, diff, commit, engine: str = LINE_ENGINE):
+    if engine == PATCH_ENGINE:
+        lines = list(lines)
+        return (
+            tag_candidates(regex.detect_secrets_in_lines(lines, diff["file"], commit), SECRETS_MODE) +
+            tag_candidates(regex.detect_sensitive_in_lines(lines, diff["file"], commit), SENSITIVE_MODE)
+        )
+
+    candidates = []
+    for line in lines:
+        for category, detect in ((SECRETS_MODE, regex.detect_secret), (SENSITIVE_MODE, regex.detect_sensitive)):
+            candidate = detect(line, diff["file"], commit)
+            if candidate is not None:
+                candidate.category = category
+                candidates.append(candidate)
+
+    return candidates
+
+def tag_candidates(candidates, category: str):
+    for candidate in candidates:
+        candidate.category = category
+
+    return candidates
+
+def _init_worker(profile: bool = False, settings=None):
+    global _worker_regex
+    if _worker_regex is None:
+        _worker_regex = Regex(**(settings or {}))
+
+    # A forked worker must not report the parent's data collected before the fork
+    _worker_regex.profiler = Profiler() if profile else None
+
+# Worker task: returns candidates without commit, the first local id, count of ids used for the diff
+# and worker state collected for the diff: rule overruns and profiler data (None if profiling is off)
+def _detect_diff_task(diff, mode: str, engine: str):
+    first_id = _worker_regex.last_id
+    candidates = detect_diff(_worker_regex, diff, None, mode, engine)
+    state = {
+        "guards": _worker_regex.drain_guards(),
+        "profile": _worker_regex.profiler.drain() if _worker_regex.profiler is not None else None,
+    }
+    return candidates, first_id, _worker_regex.last_id - first_id, state
+
+# Candidates of a cached patch bound to the commit and the patch, with new ids
+def rebind_candidates(regex, candidates, commit, patch):
+    for candidate in candidates:
+        candidate.bind(regex.last_id, commit, patch)
+        regex.last_id += 1
+
+    return candidates
+
+# "detect_diff" which reuses results of identical patches from the detection cache.
+# Candidates keep the patch their context is taken from
+def detect_diff_cached(regex, cache, diff, commit, mode: str, engine: str = LINE_ENGINE):
+    key = None
+    if cache is not None:
+        key = cache.key(diff, mode)
+        cached = cache.get(key)
+        if cached is not None:
+            return rebind_candidates(regex, cached, commit, diff["patch"])
+
+    candidates = detect_diff(regex, diff, commit, mode, engine)
+    # Results of a diff matched with a skipped or overrunning rule may be incomplete, they are never reused
+    if cache is not None and not regex.take_tainted():
+        cache.put(key, candidates)
+
+    for candidate in candidates:
+        candidate.patch = diff["patch"]
+
+    return candidates
+
+# Candidates of a downgraded file are never reported without the LLM check
+def downgrade_candidates(candidates):
+    for candidate in candidates:
+        if candidate.kind == "Instant":
+            candidate.kind = "LLM"
+
+    return candidates
+
+# Run heuristic detection over all diffs of the commits. Yields candidates in commits order.
+# With workers > 1 diffs are sharded across processes, ids are rebased onto "regex.last_id" in commits order,
+# so they are the same as in a single-process run. Patches found in the detection cache are not matched again.
+# Diffs skipped by the file classifier are dropped before matching and caching.
+# Candidates reference the commit's interned hash and message, not the commit itself
+def iter_candidates(regex, commits, mode: str, engine: str = LINE_ENGINE, workers: int = 1, cache=None, classifier=None):
+    profiler = regex.profiler
+    table = CommitTable()
+
+    # Time spent in producing commits and their diffs is the "git" stage
+    def iter_diffs(commit):
+        diffs = commit["diffs"] if profiler is None else profiler.timed_iter("git", commit["diffs"])
+        if classifier is None:
+            return ((diff, None) for diff in diffs)
+        return classify_diffs(diffs)
+
+    def classify_diffs(diffs):
+        for diff in diffs:
+            if profiler is None:
+                action = classifier.classify(diff)
+            else:
+                with profiler.stage("classify"):
+                    action = classifier.classify(diff)
+
+            if action != SKIP:
+                yield diff, action
+
+    if profiler is not None:
+        commits = profiler.timed_iter("git", commits, "commits")
+
+    if workers <= 1:
+        for commit in commits:
+            info = table.intern(commit)
+            for diff, action in iter_diffs(commit):
+                candidates = detect_diff_cached(regex, cache, diff, info, mode, engine)
+                yield from downgrade_candidates(candidates) if action == DOWNGRADE else candidates
+
+        if cache is not None:
+            cache.flush()
+        return
+
+    # Cache lookups are done here, only the missed patches go to the workers
+    def iter_tasks():
+        for commit in commits:
+            info = table.intern(commit)
+            for diff, action in iter_diffs(commit):
+                key = cached = None
+                if cache is not None:
+                    key = cache.key(diff, mode)
+                    cached = cache.get(key)
+
+                args = None if cached is not None else (diff, mode, engine)
+                yield (info, diff["patch"], key, cached, action), args
+
+    global _worker_regex
+    _worker_regex = regex
+
+    # Imported only for multiprocess runs, single-process ones (hooks) don't pay for multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(profiler is not None, regex.settings())) as ex:
+        for (commit, patch, key, cached, action), result in imap_ordered(
+                ex, _detect_diff_task, iter_tasks(), workers * PENDING_PER_WORKER):
+            if cached is not None:
+                candidates = rebind_candidates(regex, cached, commit, patch)
+                yield from downgrade_candidates(candidates) if action == DOWNGRADE else candidates
+                continue
+
+            candidates, first_id, used_ids, state = result
+            regex.merge_guards(state["guards"])
+            if state["profile"] is not None:
+                profiler.merge(state["profile"])
+            if cache is not None and not any(guard["tainted"] for guard in state["guards"].values()):
+                cache.put(key, candidates)
+
+            base_id = regex.last_id
+            regex.last_id += used_ids
+
+            for candidate in candidates:
+                candidate.bind(base_id + candidate.id - first_id, commit, patch)
+
+            yield from downgrade_candidates(candidates) if action == DOWNGRADE else candidates
+
+    if cache is not None:
+        cache.flush()
@@ -0,0 +1,115 @@
+import json
+import os
+import sqlite3
+import time
+from typing import Iterable, List
+
+from src.core.repository import TMP_FOLDER
+
+STATE_DB_NAME = "state.sqlite3"
+
+# Persistent store of already scanned commits and their findings.
+# A scan "version" is (mode, rules version, prompt version): changing rules or prompts makes every commit unseen again
+class StateStore:
+    def __init__(self, path: str | None = None):
+        if path is None:
+            tmp_folder = os.path.abspath(TMP_FOLDER)
+            os.makedirs(tmp_folder, exist_ok=True)
+            path = os.path.join(tmp_folder, STATE_DB_NAME)
+
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS scanned_commits (
+                repo TEXT NOT NULL,
+                commit_hash TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                rules_version TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                scanned_at REAL NOT NULL,
+                PRIMARY KEY (repo, commit_hash, mode, rules_version, prompt_version)
+            );
+            CREATE TABLE IF NOT EXISTS findings (
+                repo TEXT NOT NULL,
+                commit_hash TEXT NOT NULL,
+                mode TEXT NOT NULL,
+                rules_version TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                finding TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS findings_commit
+                ON findings (repo, commit_hash, mode, rules_version, prompt_version);
+        """)
+
+    def scanned_hashes(self, repo: str, version) -> set:
+        rows = self.conn.execute(
+            "SELECT commit_hash FROM scanned_commits "
+            "WHERE repo = ? AND mode = ? AND rules_version = ? AND prompt_version = ?",
+            (repo, *version),
+        )
+        return {row[0] for row in rows}
+
+    # Mark commits as scanned and store their findings in one transaction
+    def save_scan(self, repo: str, version, commit_hashes: Iterable[str], findings: List[dict]):
+        now = time.time()
+
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO scanned_commits VALUES (?, ?, ?, ?, ?, ?)",
+                [(repo, h, *version, now) for h in commit_hashes],
+            )
+            self.conn.executemany(
+                "INSERT INTO findings VALUES (?, ?, ?, ?, ?, ?)",
+                [(repo, f["commit_hash"], *version, json.dumps(f)) for f in findings],
+            )
+
+    def load_findings(self, repo: str, version, commit_hashes: Iterable[str]) -> List[dict]:
+        findings = []
+
+        for h in commit_hashes:
+            rows = self.conn.execute(
+                "SELECT finding FROM findings "
+                "WHERE repo = ? AND commit_hash = ? AND mode = ? AND rules_version = ? AND prompt_version = ?",
+                (repo, h, *version),
+            )
+            findings.extend(json.loads(row[0]) for row in rows)
+
+        return findings
+
+    def close(self):
+        self.conn.close()
+
+# Incremental run over one repository: skips commits seen under the same version and
+# merges their stored findings with the new ones
+class IncrementalScan:
+    def __init__(self, store: StateStore, repo: str, version):
+        self.store = store
+        self.repo = repo
+        self.version = version
+        self.seen = store.scanned_hashes(repo, version)
+        self.window = []
+        self.scanned = []
+
+    # Pass through only unseen commits, remembering the whole window of commits
+    def filter(self, commits):
+        for commit in commits:
+            self.window.append(commit["hash"])
+            if commit["hash"] in self.seen:
+                continue
+
+            self.scanned.append(commit["hash"])
+            yield commit
+
+    # Save findings of the scanned commits and return them merged with stored ones in commits order.
+    # Unfinished commits (e.g. with dropped LLM batches) are not saved, so the next run scans them again
+    def finish(self, findings: List[dict], unfinished: set = frozenset()) -> List[dict]:
+        self.store.save_scan(
+            self.repo,
+            self.version,
+            [h for h in self.scanned if h not in unfinished],
+            [f for f in findings if f["commit_hash"] not in unfinished],
+        )
+
+        stored = self.store.load_findings(self.repo, self.version, [h for h in self.window if h in self.seen])
+        order = {h: i for i, h in enumerate(self.window)}
+
+        return sorted(findings + stored, key=lambda f: order.get(f["commit_hash"], len(order)))
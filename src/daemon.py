@@ -0,0 +1,207 @@
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+from src.cli.cli import CLI, StaticCLI
+from src.cli.args import args, daemon_args
+from src.core.detection_cache import DetectionCache
+from src.core.llm.cache import VerdictCache
+from src.core.llm.llm import LLM
+from src.core.regex import Regex
+from src.core.repository import Repository, TMP_FOLDER
+from src.core.scanner import SECRETS_MODE, SENSITIVE_MODE, MODE_CATEGORIES
+from src.helpers.parallel_helper import BudgetedLLM
+from src.main import get_analysis, get_classifier, get_exit_code, THREADS_LLM_ENGINE
+
+DAEMON_SOCKET_NAME = "daemon.sock"
+
+# Scanner args a job may set, the others keep their defaults
+JOB_ARGS = (
+    "repo",
+    "n",
+    "range",
+    "staged",
+    "out",
+    "engine",
+    "diff_backend",
+    "no_dedup",
+    "allow_path",
+    "deny_path",
+    "max_patch_size",
+    "no_file_filter",
+    "llm_input_tokens",
+    "llm_output_tokens",
+)
+
+# Mode and scanner args of a job {"repo": path, "mode": "secrets"|"sensitive"|"all", "n": count, ...scanner args}.
+# Jobs share the process with other jobs, so the heuristic stage runs in a single process and LLM requests
+# are sent from threads
+def job_cli(job: dict, **values):
+    job = dict(job)
+    mode = job.pop("mode", SECRETS_MODE)
+    if mode not in MODE_CATEGORIES:
+        raise ValueError(f"Unknown mode: {mode}")
+
+    unknown = set(job) - set(JOB_ARGS)
+    if unknown:
+        raise ValueError(f"Unknown job fields: {', '.join(sorted(unknown))}")
+    if "repo" not in job:
+        raise ValueError("Job has no repo")
+
+    cli = StaticCLI(args, mode=mode, workers=1, llm_engine=THREADS_LLM_ENGINE, **job, **values)
+    return mode, cli
+
+def get_socket_path(path: str | None = None) -> str:
+    return path or os.path.join(os.path.abspath(TMP_FOLDER), DAEMON_SOCKET_NAME)
+
+# Resident state shared by the jobs: rule sets with compiled regexes, the LLM client with its connection pool
+# and one budget of LLM requests in flight, verdicts and detection caches
+class ScanDaemon:
+    def __init__(self, regex, llm, cache=None, detections=None):
+        self.regex = regex
+        self.llm = llm
+        self.cache = cache
+        self.detections = detections
+        self.jobs = 0
+        self._lock = threading.Lock()
+
+    def next_job_id(self) -> int:
+        with self._lock:
+            self.jobs += 1
+            return self.jobs
+
+    # Heuristic stage of a job runs in its own thread on a fork of the warm Regex
+    def run_job(self, job: dict):
+        mode, cli = job_cli(job)
+
+        return get_analysis(mode)(
+            Repository(cli.get_arg("repo"), cli.get_arg("n")),
+            cli,
+            self.regex.fork(),
+            self.llm,
+            cache=self.cache,
+            detections=self.detections,
+            classifier=get_classifier(cli),
+        )
+
+    # Run the job and send its events: "accepted", a "finding" per finding of the report, "done" (or "error")
+    def handle_job(self, job, send):
+        job_id = self.next_job_id()
+        start = time.perf_counter()
+        send({"event": "accepted", "job": job_id})
+
+        try:
+            results, metadata = self.run_job(job)
+        except Exception as e:
+            send({"event": "error", "job": job_id, "error": f"{type(e).__name__}: {e}"})
+            return
+
+        for finding in results:
+            send({"event": "finding", "job": job_id, "finding": finding})
+
+        send({
+            "event": "done",
+            "job": job_id,
+            "findings": len(results),
+            "seconds": round(time.perf_counter() - start, 4),
+            "metadata": metadata,
+        })
+
+# Connection handler: reads JSON jobs line by line and writes events of every job as JSON lines
+class JobHandler(socketserver.StreamRequestHandler):
+    def send(self, event):
+        self.wfile.write((json.dumps(event) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+    def handle(self):
+        for raw in self.rfile:
+            if not raw.strip():
+                continue
+
+            try:
+                job = json.loads(raw)
+            except ValueError as e:
+                self.send({"event": "error", "error": f"Invalid job: {e}"})
+                continue
+
+            self.server.scan_daemon.handle_job(job, self.send)
+
+def serve(cli):
+    regex = Regex(
+        bound=cli.get_arg("bound_rules"),
+        rule_budget=cli.get_arg("rule_budget"),
+        line_window=cli.get_arg("line_window"),
+    )
+    for mode in (SECRETS_MODE, SENSITIVE_MODE):
+        regex.warm(mode)
+
+    # The client (and the SDK) is created up front, the clients of one-off scans are created lazily
+    client = LLM(os.getenv("API_TOKEN"), os.getenv("LLM_MODEL"))
+    _ = client.client
+    llm = BudgetedLLM(client, cli.get_arg("llm_concurrency"))
+    cache = None if cli.get_arg("no_llm_cache") else VerdictCache()
+    detections = None if cli.get_arg("no_detection_cache") else DetectionCache(regex.detection_version())
+
+    path = get_socket_path(cli.get_arg("socket"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        os.remove(path)
+
+    server = socketserver.ThreadingUnixStreamServer(path, JobHandler)
+    server.daemon_threads = True
+    server.scan_daemon = ScanDaemon(regex, llm, cache, detections)
+    os.chmod(path, 0o600)
+    print(f"Scan daemon is listening on {path}", flush=True)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(path)
+        if detections is not None:
+            detections.close()
+        if cache is not None:
+            cache.close()
+
+# Send the job to a running daemon and yield its events
+def submit_job(job: dict, socket_path: str | None = None):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(get_socket_path(socket_path))
+        sock.sendall((json.dumps(job) + "\n").encode("utf-8"))
+        sock.shutdown(socket.SHUT_WR)
+
+        with sock.makefile("rb") as f:
+            for line in f:
+                yield json.loads(line)
+
+# Client mode for hooks: prints events, exits with 1 if anything was found and with 2 on errors or candidates
+# left unverified by the LLM (see "get_exit_code")
+def submit(cli) -> int:
+    status = 0
+
+    for event in submit_job(json.loads(cli.get_arg("submit")), cli.get_arg("socket")):
+        print(json.dumps(event), flush=True)
+
+        if event["event"] == "error":
+            status = 2
+        elif event["event"] == "done" and status == 0:
+            status = get_exit_code(event["findings"], event["metadata"])
+
+    return status
+
+def main():
+    cli = CLI(daemon_args, "Secrets seeker daemon", "Serve scan jobs over a Unix socket with warm rules and LLM client")
+
+    if cli.get_arg("submit"):
+        sys.exit(submit(cli))
+
+    serve(cli)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import json
+import os
+import sys
+
+from src.cli.args import args
+from src.cli.cli import StaticCLI
+from src.core.llm.cache import VerdictCache
+from src.core.llm.llm import LLM, AsyncLLM
+from src.main import restore_groups, verify_groups, finish_results, ASYNC_LLM_ENGINE
+
+# Follow-up of a scan run with --defer-llm: verifies the saved candidates and writes LLM findings into the
+# report of the job. The job file is removed once the report is written.
+# Usage: python -m src.deferred <path to <out>.deferred.json>
+
+def run_deferred(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        job = json.load(f)
+
+    cli = StaticCLI(args, out=job["out"], **job["args"])
+    groups = restore_groups(cli, job["candidates"])
+
+    llm_class = AsyncLLM if cli.get_arg("llm_engine") == ASYNC_LLM_ENGINE else LLM
+    llm = llm_class(os.getenv("API_TOKEN"), os.getenv("LLM_MODEL"))
+    cache = None if cli.get_arg("no_llm_cache") else VerdictCache(
+        ttl=cli.get_arg("llm_cache_ttl"),
+        max_entries=cli.get_arg("llm_cache_size"),
+    )
+
+    metadata = {}
+    try:
+        results = verify_groups(llm, cli, cache, groups, job["mode"], metadata)
+        finish_results(cli, None, results, groups, metadata)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    os.remove(path)
+    return results
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python -m src.deferred <path to <out>.deferred.json>")
+
+    run_deferred(sys.argv[1])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from src.cli.args import fleet_args
+from src.cli.cli import CLI
+from src.core.detection_cache import DetectionCache
+from src.core.llm.cache import VerdictCache
+from src.core.llm.llm import LLM
+from src.core.regex import Regex
+from src.core.repository import Repository, get_clone_name
+from src.core.scanner import SECRETS_MODE, MODE_CATEGORIES
+from src.daemon import job_cli
+from src.helpers.parallel_helper import BudgetedLLM
+from src.main import scan_heuristics, finish_scan, restore_groups, get_classifier
+
+# Fleet scan: every repository of the manifest goes through three stages, each with its own concurrency:
+# clone/fetch (threads), heuristic scan (processes, each one loads the rule sets once and keeps the compiled
+# regexes for all its repositories) and LLM verification (threads sharing one budget of requests in flight).
+# A repository moves on as soon as its previous stage is done, so the stages of different repositories overlap.
+# Usage: python -m src.fleet --manifest <repos.json> --out-dir <dir>
+
+SUMMARY_NAME = "summary.json"
+
+CLONE_STAGE = "clone"
+SCAN_STAGE = "scan"
+VERIFY_STAGE = "verify"
+
+# The fleet sets the report path of every repository itself
+MANIFEST_FORBIDDEN_FIELDS = ("out", "staged")
+
+_fleet_regex = None
+_fleet_detections = None
+
+# Jobs of the manifest: a JSON list of repository paths/URLs or of jobs ({"repo", "n", "mode", "name", ...}).
+# Every job gets a unique name, which is the name of its report
+def load_manifest(path: str, n: int | None = None) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+
+    if not isinstance(entries, list):
+        raise ValueError("Manifest must be a JSON list")
+
+    records = []
+    names = set()
+
+    for entry in entries:
+        job = {"repo": entry} if isinstance(entry, str) else dict(entry)
+        forbidden = set(job) & set(MANIFEST_FORBIDDEN_FIELDS)
+        if forbidden:
+            raise ValueError(f"Fields set by the fleet: {', '.join(sorted(forbidden))}")
+
+        if n is not None:
+            job.setdefault("n", n)
+
+        name = job.pop("name", None) or get_repo_name(job.get("repo", ""))
+        name = f"{name}.{job.get('mode', SECRETS_MODE)}"
+        unique = name
+        index = 2
+        while unique in names:
+            unique = f"{name}-{index}"
+            index += 1
+        names.add(unique)
+
+        # Validated here, so a broken job fails before any repository is cloned
+        job_cli(job)
+        records.append({"name": unique, "job": job, "seconds": {}})
+
+    return records
+
+# Name of the repository without its owner and ".git", the default name of a job's report
+def get_repo_name(url_or_path: str) -> str:
+    return os.path.basename(re.sub(r"\.git$", "", os.path.normpath(url_or_path.rstrip("/"))))
+
+# Clone of the job's repository in seeker_tmp, None for local repositories which are scanned in place
+def get_clone_key(job: dict) -> str | None:
+    if os.path.exists(job["repo"]):
+        return None
+
+    return get_clone_name(job["repo"])
+
+def _init_worker(settings, detection_cache: bool):
+    global _fleet_regex, _fleet_detections
+    _fleet_regex = Regex(**settings)
+    if detection_cache:
+        _fleet_detections = DetectionCache(_fleet_regex.detection_version())
+
+# Heuristic stage of a repository in a worker process. Candidates leave the process as detached states
+def _scan_task(job: dict, path: str):
+    start = time.perf_counter()
+    mode, cli = job_cli(job)
+    before = _fleet_detections.stats() if _fleet_detections is not None else None
+
+    # The job runs on a fork with its own ids, guards and profiler. Rule sets of its categories are loaded into
+    # the worker's Regex first, so the regexes the job compiles are kept for the next jobs
+    for category in MODE_CATEGORIES[mode]:
+        getattr(_fleet_regex, category)
+    regex = _fleet_regex.fork()
+    scan = scan_heuristics(Repository(path), cli, regex, mode, None, _fleet_detections, get_classifier(cli))
+
+    # Stats of the worker's detection cache cover all its repositories, only this scan's part is reported
+    if before is not None:
+        after = _fleet_detections.stats()
+        scan["metadata"]["detection_cache"] = {key: after[key] - before[key] for key in after}
+        _fleet_detections.flush()
+
+    groups = scan.pop("groups")
+    scan.pop("incremental")
+    scan["candidates"] = [candidate.to_detached_state() for group in groups.groups.values() for candidate in group]
+
+    return scan, time.perf_counter() - start
+
+class Fleet:
+    def __init__(self, cli):
+        self.cli = cli
+        self.out_dir = cli.get_arg("out_dir")
+        self.settings = {
+            "bound": cli.get_arg("bound_rules"),
+            "rule_budget": cli.get_arg("rule_budget"),
+            "line_window": cli.get_arg("line_window"),
+        }
+
+        client = LLM(os.getenv("API_TOKEN"), os.getenv("LLM_MODEL"))
+        _ = client.client
+        self.llm = BudgetedLLM(client, cli.get_arg("llm_concurrency"))
+        self.cache = None if cli.get_arg("no_llm_cache") else VerdictCache()
+
+    def report_path(self, record) -> str:
+        return os.path.join(self.out_dir, f"{record['name']}.json")
+
+    # Clone or fetch the repository and get the history and blobs its scan needs. Returns the local path
+    def clone(self, record):
+        start = time.perf_counter()
+        job = record["job"]
+
+        repo = Repository(job["repo"], job.get("n"))
+        repo.prepare(job.get("n"), job.get("range"))
+
+        return repo.path, time.perf_counter() - start
+
+    # LLM stage and the report of the repository. Returns the count of findings
+    def verify(self, record, scan):
+        start = time.perf_counter()
+        _, cli = job_cli(record["job"], out=self.report_path(record))
+
+        scan = {**scan, "groups": restore_groups(cli, scan["candidates"]), "incremental": None}
+        results, _ = finish_scan(scan, self.llm, cli, self.cache)
+
+        return len(results), time.perf_counter() - start
+
+    def run(self, records) -> dict:
+        os.makedirs(self.out_dir, exist_ok=True)
+        start = time.perf_counter()
+
+        # Workers are spawned, forking a process which already runs clone and LLM threads is unsafe
+        with ThreadPoolExecutor(max_workers=self.cli.get_arg("clone_concurrency")) as clones, \
+                ProcessPoolExecutor(
+                    max_workers=self.cli.get_arg("scan_workers"),
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.settings, not self.cli.get_arg("no_detection_cache")),
+                ) as scans, \
+                ThreadPoolExecutor(max_workers=self.cli.get_arg("verify_concurrency")) as verifications:
+            pending = {}
+
+            # Jobs of the same remote repository share its clone: a clone is reserved by one job from its fetch to
+            # the end of its heuristic stage, so a later fetch never changes the history under a running scan
+            waiting = {}
+
+            def start_clone(record):
+                pending[clones.submit(self.clone, record)] = (CLONE_STAGE, record)
+
+            def release_clone(record):
+                key = get_clone_key(record["job"])
+                if key is None:
+                    return
+                if waiting[key]:
+                    start_clone(waiting[key].popleft())
+                else:
+                    del waiting[key]
+
+            for record in records:
+                key = get_clone_key(record["job"])
+                if key in waiting:
+                    waiting[key].append(record)
+                    continue
+
+                if key is not None:
+                    waiting[key] = deque()
+                start_clone(record)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    stage, record = pending.pop(future)
+                    try:
+                        value, seconds = future.result()
+                    except Exception as e:
+                        record["error"] = f"{stage}: {type(e).__name__}: {e}"
+                        if stage != VERIFY_STAGE:
+                            release_clone(record)
+                        continue
+
+                    record["seconds"][stage] = round(seconds, 4)
+                    if stage == CLONE_STAGE:
+                        pending[scans.submit(_scan_task, record["job"], value)] = (SCAN_STAGE, record)
+                    elif stage == SCAN_STAGE:
+                        release_clone(record)
+                        pending[verifications.submit(self.verify, record, value)] = (VERIFY_STAGE, record)
+                    else:
+                        record["findings"] = value
+
+        summary = get_summary(records, time.perf_counter() - start, self.out_dir)
+        with open(os.path.join(self.out_dir, SUMMARY_NAME), "w") as f:
+            json.dump(summary, f, indent=4)
+
+        return summary
+
+    def close(self):
+        if self.cache is not None:
+            self.cache.close()
+
+# Aggregate of the fleet run: per-repository status, findings and stage times, totals and busy time of every
+# stage (sum over repositories). Wall time close to the busiest stage means the stages overlapped well
+def get_summary(records, seconds: float, out_dir: str) -> dict:
+    repos = []
+    stages = defaultdict(float)
+
+    for record in records:
+        job = record["job"]
+        entry = {
+            "name": record["name"],
+            "repo": job["repo"],
+            "mode": job.get("mode", SECRETS_MODE),
+            "status": "error" if "error" in record else "ok",
+            "findings": record.get("findings"),
+            "report": os.path.join(out_dir, f"{record['name']}.json") if "findings" in record else None,
+            "seconds": record["seconds"],
+        }
+        if "error" in record:
+            entry["error"] = record["error"]
+        repos.append(entry)
+
+        for stage, stage_seconds in record["seconds"].items():
+            stages[stage] += stage_seconds
+
+    return {
+        "totals": {
+            "repos": len(records),
+            "failed": sum(entry["status"] == "error" for entry in repos),
+            "findings": sum(entry["findings"] or 0 for entry in repos),
+            "seconds": round(seconds, 4),
+        },
+        "stages": {stage: round(stage_seconds, 4) for stage, stage_seconds in stages.items()},
+        "repos": repos,
+    }
+
+def main():
+    cli = CLI(fleet_args, "Secrets seeker fleet", "Scan many repositories with shared rules and LLM budget")
+    records = load_manifest(cli.get_arg("manifest"), cli.get_arg("n"))
+
+    fleet = Fleet(cli)
+    try:
+        summary = fleet.run(records)
+    finally:
+        fleet.close()
+
+    print(json.dumps(summary["totals"]))
+    if summary["totals"]["failed"]:
+        sys.exit(2)
+
+if __name__ == "__main__":
+    main()
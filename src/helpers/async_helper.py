@@ -0,0 +1,209 @@
+import asyncio
+import json
+import random
+import time
+from typing import List
+
+from src.helpers.batch_helper import TokenBudget, plan_batches, is_splittable, match_response, dropped_batch
+
+# HTTP statuses worth retrying, any other status error drops the batch at once
+RETRYABLE_STATUSES = (408, 409, 429)
+
+# Concurrency limiter with AIMD control: the limit grows by one request per "round trip" while requests
+# are fast and succeed, and is halved on throttling (429) or latency above the target.
+# Retry-After pauses all requests until the moment the server asked for
+class AdaptiveLimiter:
+    def __init__(
+            self,
+            initial: int = 4,
+            minimum: int = 1,
+            maximum: int = 32,
+            target_latency: float = 15.0,
+    ):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.throttled = 0
+        self._cond = None
+        self._loop = None
+
+    # Condition is bound to the running loop, so the limiter can be reused by later "asyncio.run" calls
+    def _condition(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._cond = asyncio.Condition()
+            self._loop = loop
+        return self._cond
+
+    async def acquire(self):
+        cond = self._condition()
+
+        async with cond:
+            while True:
+                pause = self.paused_until - time.monotonic()
+                if pause > 0:
+                    try:
+                        await asyncio.wait_for(cond.wait(), pause)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+
+                await cond.wait()
+
+    async def release(self, latency: float | None = None, throttled: bool = False, retry_after: float | None = None):
+        cond = self._condition()
+
+        async with cond:
+            self.in_flight -= 1
+
+            if throttled:
+                self.throttled += 1
+                self.limit = max(self.minimum, self.limit / 2)
+                if retry_after:
+                    self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+            elif latency is not None:
+                if latency > self.target_latency:
+                    self.limit = max(self.minimum, self.limit / 2)
+                else:
+                    self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+            cond.notify_all()
+
+    def stats(self):
+        return {
+            "limit": round(self.limit, 2),
+            "throttled": self.throttled,
+        }
+
+# HTTP status of an SDK exception, None for connection errors and timeouts
+def _status_code(e: Exception):
+    return getattr(e, "status_code", None)
+
+# Seconds from the Retry-After header of a throttled response
+def _retry_after(e: Exception):
+    headers = getattr(getattr(e, "response", None), "headers", None) or {}
+    value = headers.get("retry-after")
+
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+def _is_retryable(e: Exception) -> bool:
+    status = _status_code(e)
+    return status is None or status in RETRYABLE_STATUSES or status >= 500
+
+# Exponential backoff with full jitter
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+# Send one batch, retrying throttled and transient failures. Returns parsed response or raises the last error
+async def verify_batch_with_retries(
+        llm,
+        limiter: AdaptiveLimiter,
+        batch,
+        schema,
+        prompt_filename,
+        max_tokens: int,
+        max_attempts: int = 5,
+):
+    for attempt in range(max_attempts):
+        await limiter.acquire()
+        start = time.monotonic()
+
+        try:
+            content = await llm.verifyBatch(batch, schema, prompt_filename, max_tokens)
+        except Exception as e:
+            throttled = _status_code(e) == 429
+            retry_after = _retry_after(e) if throttled else None
+            await limiter.release(throttled=throttled, retry_after=retry_after)
+
+            if not _is_retryable(e) or attempt + 1 == max_attempts:
+                raise
+
+            # Retry-After is already respected by the limiter pause
+            if retry_after is None:
+                await asyncio.sleep(backoff_delay(attempt))
+            continue
+
+        await limiter.release(latency=time.monotonic() - start)
+        return json.loads(content)
+
+# Async version of "verify_batch_splitting": bisects broken responses and retries items missing in a response
+async def verify_batch_splitting_async(llm, limiter, batch, schema, prompt_filename, max_tokens, max_attempts, dropped):
+    async def verify(part):
+        return await verify_batch_splitting_async(
+            llm, limiter, part, schema, prompt_filename, max_tokens, max_attempts, dropped
+        )
+
+    async def bisect():
+        middle = len(batch) // 2
+        halves = await asyncio.gather(verify(batch[:middle]), verify(batch[middle:]))
+        return halves[0] + halves[1]
+
+    try:
+        parsed = await verify_batch_with_retries(
+            llm, limiter, batch, schema, prompt_filename, max_tokens, max_attempts
+        )
+    except Exception as e:
+        if len(batch) > 1 and is_splittable(e):
+            return await bisect()
+
+        dropped.append(dropped_batch(batch, e))
+        return []
+
+    answered, missing = match_response(batch, parsed)
+
+    if missing:
+        if answered:
+            answered += await verify(missing)
+        elif len(batch) > 1:
+            return await bisect()
+        else:
+            dropped.append(dropped_batch(batch, ValueError("no verdict in response")))
+
+    return answered
+
+async def _verify_all(llm, limiter, lanes, budget, max_attempts):
+    dropped = []
+    tasks = []
+    indexes = []
+
+    for index, lane in enumerate(lanes):
+        for batch in plan_batches(lane["items"], lane["prompt_filename"], budget):
+            tasks.append(verify_batch_splitting_async(
+                llm, limiter, batch, lane["schema"], lane["prompt_filename"], budget.output_tokens, max_attempts, dropped
+            ))
+            indexes.append(index)
+
+    verdicts = await asyncio.gather(*tasks)
+
+    results = [[] for _ in lanes]
+    for index, items in zip(indexes, verdicts):
+        if items:
+            results[index].append({"items": items})
+
+    return results, dropped
+
+# Run LLM requests of several lanes ({"schema", "prompt_filename", "items"}, e.g. one per category of a combined
+# scan) on one asyncio loop with adaptive concurrency. Returns (responses of every lane, dropped batches)
+def verify_lanes_async(
+        llm,
+        lanes: List[dict],
+        budget: TokenBudget | None = None,
+        limiter: AdaptiveLimiter | None = None,
+        max_attempts: int = 5,
+):
+    if not any(lane["items"] for lane in lanes):
+        return [[] for _ in lanes], []
+
+    budget = budget or TokenBudget()
+    limiter = limiter or AdaptiveLimiter()
+    return asyncio.run(_verify_all(llm, limiter, lanes, budget, max_attempts))
@@ -0,0 +1,115 @@
+import json
+from typing import List
+
+from src.core.llm.prompts_manager import getVerifyPrompt, SHARED_FIELDS
+
+# Rough tokens count of an english/code text, good enough to plan batches
+CHARS_PER_TOKEN = 4
+
+# Expected response size of one item: {"id": .., "label": "..", "reason": "<up to 80 chars>"}
+OUTPUT_TOKENS_PER_ITEM = 40
+
+# Statuses of errors which can be fixed by sending a smaller batch (failed JSON validation, too large request)
+SPLITTABLE_STATUSES = (400, 413)
+
+class TokenBudget:
+    def __init__(
+            self,
+            input_tokens: int = 6000,
+            output_tokens: int = 512,
+            output_tokens_per_item: int = OUTPUT_TOKENS_PER_ITEM,
+            max_items: int = 15,
+    ):
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.output_tokens_per_item = output_tokens_per_item
+        self.max_items = max_items
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+# Estimate tokens of the item in the compact prompt. Commit message and context lines already written for
+# the batch ("seen" keys) are not counted again. Returns (tokens, keys the item adds to the batch)
+def estimate_item_tokens(item: dict, seen) -> tuple:
+    chars = sum(len(f"{k}={v} ") for k, v in item.items() if k not in SHARED_FIELDS) + len("commit=C1 context=X1")
+    keys = []
+
+    commit = item.get("commit_hash", item.get("commit_message"))
+    if commit not in seen:
+        keys.append(commit)
+        chars += len(str(item.get("commit_message") or "")) + len("C1: \n")
+
+    file_name = item.get("file", item.get("file_name"))
+    start = item.get("context_start")
+    for offset, line in enumerate(item.get("context") or ()):
+        key = (commit, file_name, line if start is None else start + offset)
+        if key not in seen:
+            keys.append(key)
+            chars += len(line) + 1
+
+    return chars // CHARS_PER_TOKEN + 1, keys
+
+# Greedily pack items into batches which fit into the input and the output token budgets.
+# An item which doesn't fit even alone gets a batch of its own
+def plan_batches(items: List[dict], prompt_filename: str, budget: TokenBudget) -> List[List[dict]]:
+    base_tokens = estimate_tokens(getVerifyPrompt([], prompt_filename))
+    max_items = max(1, min(budget.max_items, budget.output_tokens // budget.output_tokens_per_item))
+
+    batches = []
+    batch = []
+    batch_tokens = base_tokens
+    seen = set()
+
+    for item in items:
+        tokens, keys = estimate_item_tokens(item, seen)
+
+        if batch and (batch_tokens + tokens > budget.input_tokens or len(batch) >= max_items):
+            batches.append(batch)
+            batch = []
+            batch_tokens = base_tokens
+            seen = set()
+            tokens, keys = estimate_item_tokens(item, seen)
+
+        batch.append(item)
+        batch_tokens += tokens
+        seen.update(keys)
+
+    if batch:
+        batches.append(batch)
+
+    return batches
+
+# Whether a failed batch is worth bisecting: truncated JSON or a request rejected for its size/validation
+def is_splittable(e: Exception) -> bool:
+    return isinstance(e, json.JSONDecodeError) or getattr(e, "status_code", None) in SPLITTABLE_STATUSES
+
+# Split parsed response into items answered for this batch and batch items missing in the response
+def match_response(batch: List[dict], parsed) -> tuple:
+    ids = {item["id"] for item in batch}
+    answered = [item for item in get_verdicts(parsed) if item["id"] in ids]
+
+    answered_ids = {item["id"] for item in answered}
+    missing = [item for item in batch if item["id"] not in answered_ids]
+
+    return answered, missing
+
+# Well-formed verdicts of a response, anything else in it (or a response of another shape) is ignored,
+# so the items it should have answered count as missing
+def get_verdicts(parsed) -> List[dict]:
+    items = parsed.get("items") if isinstance(parsed, dict) else None
+    if not isinstance(items, list):
+        return []
+
+    return [
+        item for item in items
+        if isinstance(item, dict)
+        and isinstance(item.get("id"), (int, str))
+        and isinstance(item.get("label"), str)
+        and isinstance(item.get("reason"), str)
+    ]
+
+def dropped_batch(batch: List[dict], e: Exception) -> dict:
+    return {
+        "ids": [item["id"] for item in batch],
+        "error": f"{type(e).__name__}: {e}",
+    }
@@ -14,4 +14,12 @@ def same_fingerprint(s1: str, s2: str) -> bool:
     sf1 = secret_fingerprint(s1)
     sf2 = secret_fingerprint(s2)
 
-    return hmac.compare_digest(sf1, sf2)
\ No newline at end of file
+    return hmac.compare_digest(sf1, sf2)
+
+# Hash of files contents, used to version caches by rules and prompts files
+def files_digest(*paths: str) -> str:
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            h.update(hashlib.sha256(f.read()).digest())
+    return h.hexdigest()[:16]
@@ -1,36 +1,102 @@
 import json
+import threading
+from collections import deque
 from concurrent.futures import as_completed
 from concurrent.futures.thread import ThreadPoolExecutor
 from typing import Iterable, List
 
+from src.helpers.batch_helper import TokenBudget, plan_batches, is_splittable, match_response, dropped_batch
+
 # Batches generator function
 def chunked(seq: List, size: int) -> Iterable[List]:
     for i in range(0, len(seq), size):
         yield seq[i:i+size]
 
-# Run LLM requests using Threads for speedup
-def verify_batches_parallel(
+# Submit tasks to the executor keeping at most max_pending of them in flight.
+# Tasks are (tag, args) pairs, (tag, result) pairs are yielded in tasks order.
+# Tasks with args None are not submitted and keep their place in the order with result None
+def imap_ordered(executor, fn, tasks: Iterable, max_pending: int):
+    pending = deque()
+
+    for tag, args in tasks:
+        pending.append((tag, None if args is None else executor.submit(fn, *args)))
+
+        if len(pending) >= max_pending:
+            tag, fut = pending.popleft()
+            yield tag, fut and fut.result()
+
+    while pending:
+        tag, fut = pending.popleft()
+        yield tag, fut and fut.result()
+
+# Verify one batch. Broken responses (e.g. truncated JSON) are bisected, items missing in a response are retried.
+# Returns verdict items, batches which can't be verified are appended to dropped
+def verify_batch_splitting(llm, batch: List[dict], schema, prompt_filename: str, max_tokens: int, dropped: List[dict]):
+    def bisect():
+        middle = len(batch) // 2
+        return (
+            verify_batch_splitting(llm, batch[:middle], schema, prompt_filename, max_tokens, dropped) +
+            verify_batch_splitting(llm, batch[middle:], schema, prompt_filename, max_tokens, dropped)
+        )
+
+    try:
+        content = llm.verifyBatch(batch, schema, prompt_filename, max_tokens)
+        parsed = json.loads(content)
+    except Exception as e:
+        if len(batch) > 1 and is_splittable(e):
+            return bisect()
+
+        dropped.append(dropped_batch(batch, e))
+        return []
+
+    answered, missing = match_response(batch, parsed)
+
+    if missing:
+        if answered:
+            answered += verify_batch_splitting(llm, missing, schema, prompt_filename, max_tokens, dropped)
+        elif len(batch) > 1:
+            return bisect()
+        else:
+            dropped.append(dropped_batch(batch, ValueError("no verdict in response")))
+
+    return answered
+
+# LLM client proxy which keeps requests of all the scans sharing the client within one concurrency budget
+class BudgetedLLM:
+    def __init__(self, llm, max_in_flight: int):
+        self.llm = llm
+        self.model = llm.model
+        self.budget = threading.BoundedSemaphore(max_in_flight)
+
+    def verifyBatch(self, *args, **kwargs):
+        with self.budget:
+            return self.llm.verifyBatch(*args, **kwargs)
+
+# Run LLM requests of several lanes ({"schema", "prompt_filename", "items"}), e.g. one per category of a combined
+# scan, using Threads for speedup. Batches of all lanes share one pool of threads. Returns responses of every lane
+def verify_lanes_parallel(
         llm,
-        schema,
-        items: List[dict],
-        prompt_filename: str,
-        batch_size: int = 15,
+        lanes: List[dict],
         max_workers: int = 9,
+        dropped: List[dict] | None = None,
+        budget: TokenBudget | None = None,
 ):
-    batches = list(chunked(items, batch_size))
-    results = []
+    budget = budget or TokenBudget()
+    dropped = [] if dropped is None else dropped
+    results = [[] for _ in lanes]
 
     with ThreadPoolExecutor(max_workers=max_workers) as ex:
-        future_to_idx = {
-            ex.submit(llm.verifyBatch, batch, schema, prompt_filename): idx for idx, batch in enumerate(batches)
+        futures = {
+            ex.submit(
+                verify_batch_splitting, llm, batch, lane["schema"], lane["prompt_filename"], budget.output_tokens, dropped
+            ): index
+            for index, lane in enumerate(lanes)
+            for batch in plan_batches(lane["items"], lane["prompt_filename"], budget)
         }
 
-        for fut in as_completed(future_to_idx):
-            try:
-                content = fut.result()
-                parsed = json.loads(content)
-                results.append(parsed)
-            except Exception as e:
-                print(e)
+        for fut in as_completed(futures):
+            verdicts = fut.result()
+            if verdicts:
+                results[futures[fut]].append({"items": verdicts})
 
-    return results
\ No newline at end of file
+    return results
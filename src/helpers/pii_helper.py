@@ -0,0 +1,202 @@
+import ipaddress
+import re
+
+from resources.pii_rules import CARD_RULES, IBAN_RULES, SSN_RULES, PHONE_RULES, EMAIL_RULES, IP_RULES, \
+    NOISE_RULES, CARD_BRANDS, TEST_CARD_NUMBERS, IBAN_LENGTHS, EXAMPLE_IBANS, EXAMPLE_SSNS, \
+    EXAMPLE_EMAIL_DOMAINS, RESERVED_TLDS, FILE_EXTENSION_TLDS, SERVICE_EMAIL_LOCAL_PARTS, ROLE_EMAIL_LOCAL_PARTS, \
+    PLACEHOLDER_EMAIL_LOCAL_PARTS
+from src.helpers.regex_helper import is_example_like
+
+# Verdicts of the local validation: report the match, drop it, or leave it to the LLM
+ACCEPT = "accept"
+REJECT = "reject"
+ESCALATE = "escalate"
+
+# Words of the line which say what a number is (the line is lowercased)
+_CARD_CONTEXT = re.compile(r"(?<![a-z])(?:card|credit|debit|pan(?![a-z])|cc(?:_|-|num)|visa|mastercard|amex|payment)")
+_PHONE_CONTEXT = re.compile(r"(?<![a-z])(?:phone|tel(?:ephone)?(?![a-z])|mobile|cell(?:phone)?(?![a-z])|fax(?![a-z])|whatsapp)")
+_SSN_CONTEXT = re.compile(r"(?<![a-z])(?:ssn|social[\s_-]?security)")
+
+_PHONE_EXTENSION = re.compile(r"\s*(?:#|x\.?|ext\.?|extension)\s*\d*\s*$", re.IGNORECASE)
+_SEPARATORS = re.compile(r"[\s.\-()/]")
+_DOMAIN = re.compile(r"[a-z0-9-]+(?:\.[a-z0-9-]+)+")
+
+# The same digit or an ascending/descending run: "0000000000", "1234567890"
+def is_trivial_digits(digits: str) -> bool:
+    if len(set(digits)) == 1:
+        return True
+
+    steps = {(int(b) - int(a)) % 10 for a, b in zip(digits, digits[1:])}
+    return steps in ({1}, {9})
+
+def luhn_valid(digits: str) -> bool:
+    total = 0
+    for index, char in enumerate(reversed(digits)):
+        digit = int(char)
+        if index % 2:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+
+    return total % 10 == 0
+
+# Brand of the card number by its issuer prefix and length, None if no brand issues such numbers
+def card_brand(digits: str) -> str | None:
+    for brand, spec in CARD_BRANDS.items():
+        if len(digits) not in spec["lengths"]:
+            continue
+
+        for low, high in spec["prefixes"]:
+            if low <= digits[:len(low)] <= high:
+                return brand
+
+    return None
+
+# ISO 13616 check: known country, its length and the mod-97 checksum
+def iban_valid(iban: str) -> bool:
+    if IBAN_LENGTHS.get(iban[:2]) != len(iban) or not iban.isalnum():
+        return False
+
+    rearranged = iban[4:] + iban[:4]
+    return int("".join(str(int(char, 36)) for char in rearranged)) % 97 == 1
+
+# US SSN structure: area 001-665 or 667-899, group 01-99, serial 0001-9999
+def ssn_valid(digits: str) -> bool:
+    area, group, serial = int(digits[:3]), digits[3:5], digits[5:]
+    return 0 < area < 900 and area != 666 and group != "00" and serial != "0000"
+
+# Phone number plausibility: E.164 length, NANP area and exchange codes, fictional 555-01XX numbers
+def phone_plausible(value: str) -> bool:
+    digits = re.sub(r"\D", "", value)
+    if not 7 <= len(digits) <= 15 or is_trivial_digits(digits):
+        return False
+
+    # National numbers with a trunk "0" and international numbers of other countries are checked by length only
+    international = value.lstrip().startswith("+")
+    nanp = len(digits) == 10 or (len(digits) == 11 and digits[0] == "1")
+    if nanp and digits[0] != "0" and (not international or digits[0] == "1"):
+        area, exchange, line = digits[-10:-7], digits[-7:-4], digits[-4:]
+        if area[0] in "01" or exchange[0] in "01" or area[1:] == "11":
+            return False
+        if exchange == "555" and "0100" <= line <= "0199":
+            return False
+
+    return True
+
+def validate_card(value: str, line: str, path: str) -> str:
+    digits = _SEPARATORS.sub("", value)
+    if not digits.isdigit():
+        return ESCALATE
+    if not 12 <= len(digits) <= 19 or is_trivial_digits(digits) or not luhn_valid(digits):
+        return REJECT
+    if digits in TEST_CARD_NUMBERS:
+        return REJECT
+
+    grouped = digits != value.strip()
+    if card_brand(digits) is None or is_example_like(value, line, path):
+        return ESCALATE
+    if grouped or _CARD_CONTEXT.search(line.lower()):
+        return ACCEPT
+
+    return ESCALATE
+
+def validate_iban(value: str, line: str, path: str) -> str:
+    iban = re.sub(r"\s", "", value).upper()
+    if not iban_valid(iban) or iban in EXAMPLE_IBANS:
+        return REJECT
+    if is_example_like(value, line, path):
+        return ESCALATE
+
+    return ACCEPT
+
+def validate_ssn(value: str, line: str, path: str) -> str:
+    digits = re.sub(r"[\s-]", "", value)
+    if len(digits) != 9 or not digits.isdigit():
+        return ESCALATE
+    if not ssn_valid(digits) or is_trivial_digits(digits) or digits in EXAMPLE_SSNS:
+        return REJECT
+    if "-" in value and _SSN_CONTEXT.search(line.lower()) and not is_example_like(value, line, path):
+        return ACCEPT
+
+    return ESCALATE
+
+def validate_phone(value: str, line: str, path: str) -> str:
+    number = _PHONE_EXTENSION.sub("", value)
+    if re.search(r"[^\d\s.\-()+/*]", number):
+        # Letters of OCR-tolerant rules ("O" for "0") can't be checked
+        return ESCALATE
+    if not phone_plausible(number):
+        return REJECT
+
+    # A bare run of digits (ids, hashes, hex strings) is a phone number only where the line says so
+    formatted = not number.strip().isdigit()
+    context = _PHONE_CONTEXT.search(line.lower()) is not None
+    if not formatted and not context:
+        return REJECT
+    if formatted and context and not is_example_like(value, line, path):
+        return ACCEPT
+
+    return ESCALATE
+
+def validate_email(value: str, line: str, path: str) -> str:
+    local, _, domain = value.strip().rstrip(".,;:)]}>").rpartition("@")
+    local = local.lstrip("@").lower()
+    domain = domain.lower()
+
+    # Matches of the looser rules may run past the address
+    if not _DOMAIN.fullmatch(domain):
+        return ESCALATE
+
+    labels = domain.split(".")
+    tld = labels[-1]
+    if not local or not tld.isalpha() or len(tld) < 2 or not all(labels):
+        return REJECT
+    if tld in FILE_EXTENSION_TLDS or tld in RESERVED_TLDS or local in SERVICE_EMAIL_LOCAL_PARTS:
+        return REJECT
+    if any(domain == example or domain.endswith("." + example) for example in EXAMPLE_EMAIL_DOMAINS):
+        return REJECT
+
+    # Only a whole placeholder local part ("test@corp.com") is rejected. Placeholder words inside the address
+    # ("contest@", "samplesmith@"), in the line or in the path leave the decision to the LLM
+    if local in PLACEHOLDER_EMAIL_LOCAL_PARTS:
+        return REJECT
+    if local in ROLE_EMAIL_LOCAL_PARTS or is_example_like(value, line, path):
+        return ESCALATE
+
+    return ACCEPT
+
+def reject_noise(value: str, line: str, path: str) -> str:
+    return REJECT
+
+# Addresses of private, loopback, reserved and documentation networks identify no one
+def validate_ip(value: str, line: str, path: str) -> str:
+    try:
+        address = ipaddress.ip_address(value)
+    except ValueError:
+        return REJECT
+
+    if address.is_private or address.is_loopback or address.is_reserved or address.is_multicast \
+            or address.is_link_local or address.is_unspecified:
+        return REJECT
+
+    return ESCALATE
+
+VALIDATORS = {
+    **{rule: validate_card for rule in CARD_RULES},
+    **{rule: validate_iban for rule in IBAN_RULES},
+    **{rule: validate_ssn for rule in SSN_RULES},
+    **{rule: validate_phone for rule in PHONE_RULES},
+    **{rule: validate_email for rule in EMAIL_RULES},
+    **{rule: validate_ip for rule in IP_RULES},
+    **{rule: reject_noise for rule in NOISE_RULES},
+}
+
+# Local validation of a sensitive match by the checks of its rule. Matches of rules without a validator
+# and the ones the checks can't settle are escalated
+def validate_sensitive(rule: str, value: str, line: str, path: str) -> str:
+    validator = VALIDATORS.get(rule)
+    if validator is None:
+        return ESCALATE
+
+    return validator(value, line or "", path or "")
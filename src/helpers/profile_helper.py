@@ -0,0 +1,142 @@
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+
+# Collector of per-stage wall time, counters, per-rule match time and LLM request latencies.
+# Times of the stages run in worker processes are summed over the processes
+class Profiler:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+        self.rules = {}
+        self.latencies = []
+        self._lock = threading.Lock()
+
+    def add_time(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    # Wrap iterable so the time spent producing its items is added to the stage and the items are counted
+    def timed_iter(self, stage: str, iterable, counter: str | None = None):
+        iterator = iter(iterable)
+
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_time(stage, time.perf_counter() - start)
+                return
+
+            self.add_time(stage, time.perf_counter() - start)
+            if counter is not None:
+                self.count(counter)
+            yield item
+
+    # {rule name: [seconds, calls, hits]} of the mode, filled by the regex matching functions
+    def rule_stats(self, mode: str) -> dict:
+        return self.rules.setdefault(mode, {})
+
+    def add_latency(self, seconds: float, failed: bool = False):
+        with self._lock:
+            self.latencies.append(seconds)
+            self.count("llm_requests")
+            if failed:
+                self.count("llm_failed_requests")
+
+    # Take collected data out of the profiler (used to send worker process data to the parent)
+    def drain(self) -> dict:
+        state = {"stages": self.stages, "counters": self.counters, "rules": self.rules}
+        self.stages, self.counters, self.rules = {}, {}, {}
+        return state
+
+    def merge(self, state: dict):
+        for stage, seconds in state["stages"].items():
+            self.add_time(stage, seconds)
+
+        for name, n in state["counters"].items():
+            self.count(name, n)
+
+        for mode, rules in state["rules"].items():
+            stats = self.rule_stats(mode)
+            for name, (seconds, calls, hits) in rules.items():
+                total = stats.setdefault(name, [0.0, 0, 0])
+                total[0] += seconds
+                total[1] += calls
+                total[2] += hits
+
+    def report(self, top_rules: int | None = None) -> dict:
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 4) if latencies else None
+
+        rules = {}
+        for mode, stats in self.rules.items():
+            ranked = sorted(stats.items(), key=lambda item: item[1][0], reverse=True)[:top_rules]
+            rules[mode] = [
+                {
+                    "rule": name,
+                    "seconds": round(seconds, 6),
+                    "calls": calls,
+                    "hits": hits,
+                    "us_per_call": round(seconds / calls * 1e6, 3) if calls else 0.0,
+                }
+                for name, (seconds, calls, hits) in ranked
+            ]
+
+        return {
+            "wall_seconds": round(time.perf_counter() - self.started, 4),
+            "stages": {stage: round(seconds, 4) for stage, seconds in self.stages.items()},
+            "counters": dict(self.counters),
+            "llm_latency": {
+                "count": len(latencies),
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(latencies[-1], 4) if latencies else None,
+            },
+            "rules": rules,
+        }
+
+# LLM client proxy which records latency of every request, works for both sync and async clients
+class ProfiledLLM:
+    def __init__(self, llm, profiler: Profiler):
+        self.llm = llm
+        self.model = llm.model
+        self.profiler = profiler
+
+    def verifyBatch(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = self.llm.verifyBatch(*args, **kwargs)
+        except Exception:
+            self.profiler.add_latency(time.perf_counter() - start, failed=True)
+            raise
+
+        if inspect.isawaitable(result):
+            return self._wait(result, start)
+
+        self.profiler.add_latency(time.perf_counter() - start)
+        return result
+
+    async def _wait(self, result, start: float):
+        try:
+            content = await result
+        except Exception:
+            self.profiler.add_latency(time.perf_counter() - start, failed=True)
+            raise
+
+        self.profiler.add_latency(time.perf_counter() - start)
+        return content
@@ -0,0 +1,107 @@
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:
+    import sre_parse, sre_constants
+
+REPEATS = tuple(
+    op for op in (
+        sre_constants.MAX_REPEAT,
+        sre_constants.MIN_REPEAT,
+        getattr(sre_constants, "POSSESSIVE_REPEAT", None),
+    ) if op is not None
+)
+
+# Anchors which behave differently for a single line and for lines joined into one buffer
+_LINE_DEPENDENT_ANCHORS = (
+    sre_constants.AT_BEGINNING,
+    sre_constants.AT_BEGINNING_STRING,
+    sre_constants.AT_END,
+    sre_constants.AT_END_STRING,
+)
+
+_NEWLINE_CATEGORIES = (
+    sre_constants.CATEGORY_SPACE,
+    sre_constants.CATEGORY_NOT_DIGIT,
+    sre_constants.CATEGORY_NOT_WORD,
+    sre_constants.CATEGORY_LINEBREAK,
+)
+
+_ATOMIC_GROUP = getattr(sre_constants, "ATOMIC_GROUP", None)
+
+# Safe wrapper around the stdlib regex parser
+def parse_pattern(pattern: str, flags: int = 0):
+    try:
+        return sre_parse.parse(pattern, flags)
+    except Exception:
+        return None
+
+# Check whether a character set ([...], \s, etc.) can match "\n"
+def _set_matches_newline(items) -> bool:
+    negate = False
+    matches = False
+
+    for op, av in items:
+        if op is sre_constants.NEGATE:
+            negate = True
+        elif op is sre_constants.LITERAL:
+            matches = matches or av == 10
+        elif op is sre_constants.RANGE:
+            matches = matches or av[0] <= 10 <= av[1]
+        elif op is sre_constants.CATEGORY:
+            matches = matches or av in _NEWLINE_CATEGORIES
+        else:
+            return True
+
+    return matches != negate
+
+def _is_line_local(parsed, dotall: bool) -> bool:
+    for op, av in parsed:
+        if op is sre_constants.LITERAL:
+            if av == 10: return False
+        elif op is sre_constants.NOT_LITERAL:
+            if av != 10: return False
+        elif op is sre_constants.ANY:
+            if dotall: return False
+        elif op is sre_constants.IN:
+            if _set_matches_newline(av): return False
+        elif op is sre_constants.AT:
+            if av in _LINE_DEPENDENT_ANCHORS: return False
+        elif op is sre_constants.SUBPATTERN:
+            _, add_flags, del_flags, inner = av
+            inner_dotall = (dotall or bool(add_flags & sre_constants.SRE_FLAG_DOTALL)) \
+                and not del_flags & sre_constants.SRE_FLAG_DOTALL
+            if not _is_line_local(inner, inner_dotall): return False
+        elif op in REPEATS:
+            if not _is_line_local(av[2], dotall): return False
+        elif op is sre_constants.BRANCH:
+            if not all(_is_line_local(branch, dotall) for branch in av[1]): return False
+        elif op is _ATOMIC_GROUP:
+            if not _is_line_local(av, dotall): return False
+        elif op is sre_constants.GROUPREF:
+            continue
+        else:
+            # Lookarounds and conditionals can see neighbouring lines
+            return False
+
+    return True
+
+# Minimal length of a match of the pattern
+def min_width(pattern: str, flags: int = 0) -> int:
+    parsed = parse_pattern(pattern, flags)
+    if parsed is None:
+        return 0
+
+    return parsed.getwidth()[0]
+
+# Whether the first match of the pattern in a line can be found by scanning the "\n"-joined lines at once.
+# True only for non-empty matches which never contain "\n", never depend on ^/$ and never look around
+def is_line_local(pattern: str, flags: int = 0) -> bool:
+    parsed = parse_pattern(pattern, flags)
+    if parsed is None:
+        return False
+
+    if parsed.getwidth()[0] == 0:
+        return False
+
+    dotall = bool(parsed.state.flags & sre_constants.SRE_FLAG_DOTALL)
+    return _is_line_local(parsed, dotall)
@@ -1,13 +1,27 @@
 import json
 import os
+import subprocess
+import sys
+from contextlib import nullcontext
 
 from src.cli.cli import CLI
-from src.core.regex import Regex
-from src.core.repository import Repository, iter_added_lines
-from src.core.llm.llm import LLM
+from src.core.regex import Regex, SECRETS_RULES_PATH, SENSITIVE_RULES_PATH
+from src.core.candidate import Candidate
+from src.core.classifier import FileClassifier
+from src.core.repository import Repository
+from src.core.scanner import iter_candidates, SECRETS_MODE, SENSITIVE_MODE, ALL_MODE, MODE_CATEGORIES
+from src.core.state import StateStore, IncrementalScan
+from src.core.dedup import OccurrenceGroups, collapse_findings
+from src.core.detection_cache import DetectionCache
+from src.core.llm.llm import LLM, AsyncLLM
+from src.core.llm.cache import VerdictCache, verdict_key
+from src.core.llm.prompts_manager import getPromptPath
 from dotenv import load_dotenv
 from src.cli.args import args
-from src.helpers.parallel_helper import verify_batches_parallel
+from src.helpers.parallel_helper import verify_lanes_parallel
+from src.helpers.hashing_helper import files_digest
+from src.helpers.batch_helper import TokenBudget
+from src.helpers.profile_helper import Profiler, ProfiledLLM
 from src.core.llm.schemas.verifySecretsSchema import verifySecretsSchema
 from src.core.llm.schemas.verifySensitiveSchema import verifySensitiveSchema
 
@@ -16,35 +30,201 @@ load_dotenv()
 SECRETS_VERIFY_PROMPT_NAME = "secretsDataVerifyPrompt.txt"
 SENSITIVE_VERIFY_PROMPT_NAME = "sensitiveDataVerifyPrompt.txt"
 
+THREADS_LLM_ENGINE = "threads"
+ASYNC_LLM_ENGINE = "async"
+
+# Exit codes of --exit-code: something was found, or candidates were left unverified by dropped LLM batches
+EXIT_FOUND = 1
+EXIT_UNVERIFIED = 2
+
+# Scanner args the deferred LLM stage runs with
+DEFERRED_ARGS = (
+    "llm_engine",
+    "llm_input_tokens",
+    "llm_output_tokens",
+    "no_dedup",
+    "no_llm_cache",
+    "llm_cache_ttl",
+    "llm_cache_size",
+)
+
 # Helper function to build llm-context dictionary for secrets
 def get_secrets_llm_context_obj(candidate):
     return {
-        "id": candidate["id"],
-        "rule": candidate["rule"],
-        "value": candidate["value"],
-        "file": candidate["file"],
-        "line": candidate["line"],
-        "entropy": candidate["entropy"],
-        "context": candidate["context"],
-        "commit_message": candidate["commit"]["message"],
-        "uri_detected": candidate["uri_detected"],
+        "id": candidate.id,
+        "rule": candidate.rule,
+        "value": candidate.value,
+        "file": candidate.file,
+        "line": candidate.line,
+        "entropy": candidate.entropy,
+        "context": candidate.context,
+        "context_start": candidate.context_start,
+        "commit_hash": candidate.commit.hash,
+        "commit_message": candidate.commit.message,
+        "uri_detected": candidate.uri_detected,
     }
 
+# Version of a scan for the incremental state: findings depend on the mode, rules and prompts of its categories
+def get_scan_version(mode):
+    stages = [SCAN_MODES[category] for category in MODE_CATEGORIES[mode]]
+
+    return (
+        mode,
+        files_digest(*(stage["rules_path"] for stage in stages)),
+        files_digest(*(getPromptPath(stage["prompt_filename"]) for stage in stages)),
+    )
+
+# Wrap commits stream to skip already scanned commits, if incremental mode is enabled
+def start_incremental(store, repo, commits, version):
+    if store is None:
+        return None, commits
+
+    incremental = IncrementalScan(store, repo.key, version)
+    return incremental, incremental.filter(commits)
+
 # Helper function to save result into a file
 def save_result(filename: str, result):
     with open(filename, "w") as f:
         json.dump(result, f, indent=4)
 
+# Helper function to save report metadata next to the report (<out>.meta.json)
+def save_metadata(filename: str, metadata):
+    if not metadata:
+        return
+
+    save_result(os.path.splitext(filename)[0] + ".meta.json", metadata)
+
+# Helper function to save profiling metrics next to the report (<out>.metrics.json)
+def save_metrics(filename: str, profiler):
+    if profiler is None:
+        return
+
+    save_result(os.path.splitext(filename)[0] + ".metrics.json", profiler.report())
+
+# Stage timer of the profiler, does nothing if profiling is off
+def profile_stage(profiler, name: str):
+    return nullcontext() if profiler is None else profiler.stage(name)
+
+def get_token_budget(cli):
+    return TokenBudget(
+        input_tokens=cli.get_arg("llm_input_tokens"),
+        output_tokens=cli.get_arg("llm_output_tokens"),
+    )
+
+# Send items of the lanes to the LLM with the selected engine, batches of all lanes share one pool of requests.
+# Returns responses of every lane. Dropped batches are recorded into metadata
+def run_llm(llm, engine, budget, lanes, metadata):
+    limiter = None
+    if engine == ASYNC_LLM_ENGINE:
+        # asyncio is imported only by the async engine, it is a noticeable part of the startup time
+        from src.helpers.async_helper import verify_lanes_async, AdaptiveLimiter
+        limiter = AdaptiveLimiter()
+        responses, dropped = verify_lanes_async(llm, lanes, budget=budget, limiter=limiter)
+    else:
+        dropped = []
+        responses = verify_lanes_parallel(llm, lanes, dropped=dropped, budget=budget)
+
+    metadata["llm"] = {
+        "engine": engine,
+        "items": sum(len(lane["items"]) for lane in lanes),
+        "categories": {lane["category"]: len(lane["items"]) for lane in lanes},
+        "batches_dropped": len(dropped),
+        "dropped": dropped,
+    }
+    if limiter is not None:
+        metadata["llm"]["limiter"] = limiter.stats()
+
+    return responses
+
+# Run LLM verification of the lanes. Items with cached verdicts are answered from the cache without any request
+def verify_items(llm, engine, budget, cache, lanes, mapping, metadata):
+    if cache is None:
+        return run_llm(llm, engine, budget, lanes, metadata)
+
+    keys = {}
+    cached = []
+    misses = []
+
+    for lane in lanes:
+        lane_cached = []
+        lane_misses = []
+
+        for item in lane["items"]:
+            candidate = mapping[item["id"]]
+            key = verdict_key(candidate.value, candidate.rule, lane["category"], llm.model, lane["prompt_version"])
+            verdict = cache.get(key)
+
+            if verdict is None:
+                keys[item["id"]] = key
+                lane_misses.append(item)
+            else:
+                lane_cached.append({"id": item["id"], "label": verdict[0], "reason": verdict[1]})
+
+        cached.append(lane_cached)
+        misses.append({**lane, "items": lane_misses})
+
+    responses = run_llm(llm, engine, budget, misses, metadata)
+
+    cache.put_many(
+        (keys[item["id"]], item["label"], item["reason"])
+        for lane_responses in responses
+        for response in lane_responses
+        for item in response["items"]
+        if item["id"] in keys
+    )
+    metadata["llm_cache"] = cache.stats()
+
+    return [lane_responses + [{"items": items}] for lane_responses, items in zip(responses, cached)]
+
+# Commits of the items which were dropped or deferred by the LLM stage, including all occurrences of their secrets
+def get_unfinished_commits(metadata, groups):
+    llm = metadata.get("llm", {})
+    ids = [_id for batch in llm.get("dropped", []) for _id in batch["ids"]] + llm.get("deferred", [])
+
+    return {candidate.commit.hash for _id in ids for candidate in groups.occurrences(_id)}
+
+# Occurrences of the items of dropped LLM batches: candidates which are neither reported nor cleared
+def get_unverified(metadata, groups) -> list:
+    ids = [_id for batch in metadata["llm"]["dropped"] for _id in batch["ids"]]
+
+    return [
+        {
+            "commit_hash": candidate.commit.hash,
+            "file_path": candidate.file,
+            "line": candidate.line,
+            "finding_type": candidate.rule,
+        }
+        for _id in ids
+        for candidate in groups.occurrences(_id)
+    ]
+
+# Exit code of a hook run. A hook fails closed: candidates the LLM couldn't verify block the commit or push
+# like findings do, they are printed to stderr
+def get_exit_code(findings: int, metadata) -> int:
+    unverified = metadata.get("llm", {}).get("unverified", [])
+    for candidate in unverified:
+        print(
+            f"[UNVERIFIED][{candidate['commit_hash']}][{candidate['file_path']}]: "
+            f"Line {candidate['line']}: {candidate['finding_type']}",
+            file=sys.stderr,
+        )
+
+    if unverified:
+        return EXIT_UNVERIFIED
+    if findings:
+        return EXIT_FOUND
+
+    return 0
+
 # Helper function to shape the llm output to needed format
-def form_llm_output(item, mapping):
-    _id = item["id"]
-    msg = mapping[_id]["commit"]["message"]
-    file_name = mapping[_id]["file"]
-    line = mapping[_id]["line"]
+def form_llm_output(item, candidate):
+    msg = candidate.commit.message
+    file_name = candidate.file
+    line = candidate.line
     reason = item["reason"]
-    value = mapping[_id]["value"]
-    _hash = mapping[_id]["commit"]["hash"]
-    rule = mapping[_id]["rule"]
+    value = candidate.value
+    _hash = candidate.commit.hash
+    rule = candidate.rule
     text = f"[LLM][{file_name}][msg: {msg}]: Line {line}: ${reason} | {value}"
 
     return {
@@ -58,108 +238,314 @@ def form_llm_output(item, mapping):
         "readable": text
     }
 
-# Helper function to parse LLM-response
-def parse_response(allowedValues, responses, mapping):
+# Helper function to parse LLM-response. Verdict of a representative applies to all occurrences of its secret
+def parse_response(allowedValues, responses, groups):
     tmp = []
 
     for response in responses:
         for item in response["items"]:
             if item["label"] in allowedValues:
-                tmp.append(form_llm_output(item, mapping))
+                tmp.extend(form_llm_output(item, candidate) for candidate in groups.occurrences(item["id"]))
 
     return tmp
 
-# Initiates heuristic and LLM (if needed) secrets-based-analysis of diffs
-def analyse_secrets(repo, cli, regex, llm):
-    commits = repo.get_last_commits(cli.get_arg("n"))
+# LLM lanes of the scan mode, one per category with its schema, prompt and the representatives of the category
+def get_llm_lanes(representatives, mode):
+    lanes = []
 
-    llm_reports_map = {}
-    llm_reports_list = []
-    results = []
+    for category in MODE_CATEGORIES[mode]:
+        stage = SCAN_MODES[category]
+        lanes.append({
+            "category": category,
+            "schema": stage["schema"],
+            "prompt_filename": stage["prompt_filename"],
+            "prompt_version": files_digest(getPromptPath(stage["prompt_filename"])),
+            "allowed": stage["allowed"],
+            "items": [stage["to_llm_item"](candidate) for candidate in representatives if candidate.category == category],
+        })
+
+    return lanes
+
+# Findings of a combined scan are tagged by the category they were found for
+def tag_category(finding, category, mode):
+    if mode == ALL_MODE:
+        finding["category"] = category
+
+    return finding
+
+# Send one representative of every distinct secret to the LLM and expand verdicts to all occurrences
+def verify_groups(llm, cli, cache, groups, mode, metadata, profiler=None):
+    representatives = groups.representatives()
+    metadata["dedup"] = groups.stats()
+    lanes = get_llm_lanes(representatives, mode)
+
+    with profile_stage(profiler, "llm"):
+        responses = verify_items(
+            llm,
+            cli.get_arg("llm_engine"),
+            get_token_budget(cli),
+            cache,
+            lanes,
+            mapping={candidate.id: candidate for candidate in representatives},
+            metadata=metadata,
+        )
+
+    metadata["llm"]["unverified"] = get_unverified(metadata, groups)
+
+    if profiler is not None:
+        profiler.count("llm_items", len(representatives) - metadata.get("llm_cache", {}).get("hits", 0))
+        profiler.count("llm_batches_dropped", metadata["llm"]["batches_dropped"])
 
-    for commit in commits:
-        for diff in commit["diffs"]:
-            for line in iter_added_lines(diff["patch"]):
-                candidate = regex.detect_secret(line, diff["file"], commit)
-
-                if candidate is not None:
-                    llm_context_obj = get_secrets_llm_context_obj(candidate)
-
-                    if candidate["kind"] == "LLM":
-                        llm_reports_map[candidate["id"]] = candidate
-                        llm_reports_list.append(llm_context_obj)
-                    else:
-                        results.append({
-                            "commit_hash": candidate["commit"]["hash"],
-                            "commit_message": candidate["commit"]["message"],
-                            "file_path": candidate["file"],
-                            "line": candidate["line"],
-                            "finding_type": candidate["rule"],
-                            "rationale": "Heuristic detection",
-                            "snippet": candidate["value"],
-                            "readable":
-                                f"[HEURISTIC][{candidate["file"]}][msg: {candidate["commit"]["message"]}]: Line {candidate["line"]}: ${candidate["rule"]} | {candidate["value"]}"
-                        })
-
-    batch_responses = verify_batches_parallel(
-        llm,
-        schema=verifySecretsSchema,
-        items=llm_reports_list,
-        prompt_filename=SECRETS_VERIFY_PROMPT_NAME
+    return [
+        tag_category(finding, lane["category"], mode)
+        for lane, lane_responses in zip(lanes, responses)
+        for finding in parse_response(lane["allowed"], lane_responses, groups)
+    ]
+
+# Save the candidates which need the LLM into <out>.deferred.json and verify them in a detached process
+# ("python -m src.deferred"), which writes LLM findings into <out>.llm.json. The report gets heuristic findings only
+def defer_groups(cli, groups, mode, metadata):
+    candidates = [candidate for group in groups.groups.values() for candidate in group]
+    metadata["dedup"] = groups.stats()
+    metadata["llm"] = {"engine": "deferred", "items": len(groups.groups), "deferred": []}
+    if not candidates:
+        return
+
+    stem = os.path.splitext(cli.get_arg("out"))[0]
+    path = stem + ".deferred.json"
+    save_result(path, {
+        "mode": mode,
+        "out": stem + ".llm.json",
+        "args": {name: cli.get_arg(name) for name in DEFERRED_ARGS},
+        "candidates": [candidate.to_detached_state() for candidate in candidates],
+    })
+
+    subprocess.Popen(
+        [sys.executable, "-m", "src.deferred", path],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    metadata["llm"]["deferred"] = [group[0].id for group in groups.groups.values()]
+    metadata["llm"]["job"] = path
+
+# File classifier of the scan, None if file filtering is off
+def get_classifier(cli):
+    if cli.get_arg("no_file_filter"):
+        return None
+
+    return FileClassifier(
+        allow=cli.get_arg("allow_path"),
+        deny=cli.get_arg("deny_path"),
+        max_patch_size=cli.get_arg("max_patch_size"),
     )
 
-    results.extend(parse_response(["secret", "likely_secret"], batch_responses, llm_reports_map))
-    save_result(cli.get_arg("out"), results)
+# Report metadata starts with the detection cache stats
+def get_detection_metadata(detections):
+    if detections is None:
+        return {}
+
+    return {"detection_cache": detections.stats()}
+
+# Merge stored findings (incremental mode) and collapse occurrences of the same secret.
+# Returns the report, it is saved only if there is an output path (daemon jobs may have none)
+def finish_results(cli, incremental, results, groups, metadata, profiler=None):
+    out = cli.get_arg("out")
+
+    with profile_stage(profiler, "report"):
+        if incremental is not None:
+            results = incremental.finish(results, get_unfinished_commits(metadata, groups))
+
+        if not cli.get_arg("no_dedup"):
+            results = collapse_findings(results)
+
+        if out:
+            save_result(out, results)
+            save_metadata(out, metadata)
+
+    if profiler is not None:
+        profiler.count("findings", len(results))
+    if out:
+        save_metrics(out, profiler)
+
+    return results
+
+# Helper function to build llm-context dictionary for sensitive data
+def get_sensitive_llm_context_obj(candidate):
+    return {
+        "id": candidate.id,
+        "rule": candidate.rule,
+        "file_name": candidate.file,
+        "value": candidate.value,
+        "commit_hash": candidate.commit.hash,
+        "commit_message": candidate.commit.message,
+        "context": candidate.context,
+        "context_start": candidate.context_start,
+    }
+
+# Every scan mode: rules file, LLM item builder, response schema, prompt and labels which make a finding
+SCAN_MODES = {
+    SECRETS_MODE: {
+        "rules_path": SECRETS_RULES_PATH,
+        "to_llm_item": get_secrets_llm_context_obj,
+        "schema": verifySecretsSchema,
+        "prompt_filename": SECRETS_VERIFY_PROMPT_NAME,
+        "allowed": ["secret", "likely_secret"],
+    },
+    SENSITIVE_MODE: {
+        "rules_path": SENSITIVE_RULES_PATH,
+        "to_llm_item": get_sensitive_llm_context_obj,
+        "schema": verifySensitiveSchema,
+        "prompt_filename": SENSITIVE_VERIFY_PROMPT_NAME,
+        "allowed": ["sensitive", "likely_sensitive"],
+    },
+}
+
+# Verify the groups now or, with --defer-llm, leave them to a background process
+def run_llm_stage(llm, cli, cache, groups, mode, metadata, profiler=None):
+    if cli.get_arg("defer_llm"):
+        defer_groups(cli, groups, mode, metadata)
+        return []
+
+    return verify_groups(llm, cli, cache, groups, mode, metadata, profiler)
+
+# Commits to scan: the staged changes, the revision range or the last n commits of all branches
+def get_commits(repo, cli):
+    if cli.get_arg("staged"):
+        return repo.iter_staged()
+
+    return repo.iter_commits(cli.get_arg("n"), cli.get_arg("diff_backend"), cli.get_arg("range"))
+
+# Helper function to shape an instant (heuristic) detection to the report format
+def form_heuristic_output(candidate):
+    return {
+        "commit_hash": candidate.commit.hash,
+        "commit_message": candidate.commit.message,
+        "file_path": candidate.file,
+        "line": candidate.line,
+        "finding_type": candidate.rule,
+        "rationale": "Heuristic detection",
+        "snippet": candidate.value,
+        "readable":
+            f"[HEURISTIC][{candidate.file}][msg: {candidate.commit.message}]: Line {candidate.line}: ${candidate.rule} | {candidate.value}"
+    }
 
-# Initiates heuristic and LLM sensitive-data-based-analysis of diffs
-def analyze_sensitive(repo, cli, regex, llm):
-    commits = repo.get_last_commits(cli.get_arg("n"))
+# Heuristic stage of a scan: instant detections go to the report, the other candidates are grouped for the LLM.
+# Returns the state the LLM stage continues from
+def scan_heuristics(repo, cli, regex, mode, store=None, detections=None, classifier=None):
+    commits = get_commits(repo, cli)
+    version = get_scan_version(mode)
+    incremental, commits = start_incremental(store, repo, commits, version)
 
-    llm_reports_list = []
-    llm_reports_map = {}
+    groups = OccurrenceGroups(not cli.get_arg("no_dedup"))
     results = []
 
-    for commit in commits:
-        for diff in commit["diffs"]:
-            for line in iter_added_lines(diff["patch"]):
-                candidate = regex.detect_sensitive(line, diff["file"], commit)
-                if candidate is not None:
-                    llm_reports_list.append({
-                        "id": candidate["id"],
-                        "rule": candidate["rule"],
-                        "file_name": candidate["file"],
-                        "value": candidate["value"],
-                        "commit_message": candidate["commit"]["message"],
-                        "context": candidate["context"]
-                    })
-                    llm_reports_map[candidate["id"]] = candidate
-
-    batch_responses = verify_batches_parallel(
-        llm,
-        items=llm_reports_list,
-        schema=verifySensitiveSchema,
-        prompt_filename=SENSITIVE_VERIFY_PROMPT_NAME
+    candidates = iter_candidates(
+        regex, commits, mode, cli.get_arg("engine"), cli.get_arg("workers"), detections, classifier
     )
 
-    results.extend(parse_response(["sensitive", "likely_sensitive"], batch_responses, llm_reports_map))
-    save_result(cli.get_arg("out"), results)
+    for candidate in candidates:
+        if candidate.kind == "Instant":
+            results.append(tag_category(form_heuristic_output(candidate), candidate.category, mode))
+        else:
+            groups.add(candidate)
+
+    metadata = get_detection_metadata(detections)
+    if classifier is not None:
+        metadata["file_classification"] = classifier.report()
+    if mode == ALL_MODE:
+        metadata["rule_safety"] = {category: regex.safety_report(category) for category in MODE_CATEGORIES[mode]}
+    else:
+        metadata["rule_safety"] = regex.safety_report(mode)
+
+    return {
+        "mode": mode,
+        "version": version,
+        "incremental": incremental,
+        "groups": groups,
+        "results": results,
+        "metadata": metadata,
+    }
+
+# LLM stage of a scan and the report. Returns the report and its metadata
+def finish_scan(scan, llm, cli, cache=None, profiler=None):
+    groups = scan["groups"]
+    metadata = scan["metadata"]
+
+    results = scan["results"] + run_llm_stage(llm, cli, cache, groups, scan["mode"], metadata, profiler)
+
+    return finish_results(cli, scan["incremental"], results, groups, metadata, profiler), metadata
+
+# Candidates of the heuristic stage regrouped from their detached states (deferred and fleet LLM stages)
+def restore_groups(cli, states) -> OccurrenceGroups:
+    groups = OccurrenceGroups(not cli.get_arg("no_dedup"))
+    for state in states:
+        groups.add(Candidate.from_detached_state(state))
+
+    return groups
+
+# Initiates heuristic and LLM (if needed) secrets-based-analysis of diffs. Returns the report and its metadata
+def analyse_secrets(repo, cli, regex, llm, store=None, cache=None, detections=None, classifier=None):
+    scan = scan_heuristics(repo, cli, regex, SECRETS_MODE, store, detections, classifier)
+    return finish_scan(scan, llm, cli, cache, regex.profiler)
+
+# Initiates heuristic and LLM sensitive-data-based-analysis of diffs. Returns the report and its metadata
+def analyze_sensitive(repo, cli, regex, llm, store=None, cache=None, detections=None, classifier=None):
+    scan = scan_heuristics(repo, cli, regex, SENSITIVE_MODE, store, detections, classifier)
+    return finish_scan(scan, llm, cli, cache, regex.profiler)
+
+# Initiates heuristic and LLM analysis of diffs for both secrets and sensitive data: history is walked and every
+# added line is parsed once, escalations of both categories share one pool of LLM requests. Findings are tagged
+# by category. Returns the report and its metadata
+def analyse_all(repo, cli, regex, llm, store=None, cache=None, detections=None, classifier=None):
+    scan = scan_heuristics(repo, cli, regex, ALL_MODE, store, detections, classifier)
+    return finish_scan(scan, llm, cli, cache, regex.profiler)
+
+# Analysis function of the scan mode
+def get_analysis(mode):
+    return {SECRETS_MODE: analyse_secrets, SENSITIVE_MODE: analyze_sensitive, ALL_MODE: analyse_all}[mode]
+
+# Scan mode of the command line: --mode, --sensitive is a shortcut of "--mode sensitive"
+def get_scan_mode(cli):
+    mode = cli.get_arg("mode")
+    if cli.get_arg("sensitive"):
+        if mode not in (None, SENSITIVE_MODE):
+            raise ValueError(f"--sensitive conflicts with --mode {mode}")
+        return SENSITIVE_MODE
+
+    return mode or SECRETS_MODE
 
 def main():
     # Initialize main instances
     cli = CLI(args, "Secrets seeker", "Find secrets (tokens, passwords, etc.) in your GitHub repository")
-    repo = Repository(cli.get_arg("repo"))
-    regex = Regex()
-    llm = LLM(os.getenv("API_TOKEN"), os.getenv("LLM_MODEL"))
-
-    sensitive_mode = cli.get_arg("sensitive")
-    if sensitive_mode:
-        # Run sensitivity analysis
-        analyze_sensitive(repo, cli, regex, llm)
-    else:
-        # Run secrets analysis
-        analyse_secrets(repo, cli, regex, llm)
+    repo = Repository(cli.get_arg("repo"), cli.get_arg("n"))
+    regex = Regex(
+        bound=cli.get_arg("bound_rules"),
+        rule_budget=cli.get_arg("rule_budget"),
+        line_window=cli.get_arg("line_window"),
+    )
+    llm_class = AsyncLLM if cli.get_arg("llm_engine") == ASYNC_LLM_ENGINE else LLM
+    llm = llm_class(os.getenv("API_TOKEN"), os.getenv("LLM_MODEL"))
+    if cli.get_arg("profile"):
+        regex.profiler = Profiler()
+        llm = ProfiledLLM(llm, regex.profiler)
+    # Staged changes are not a commit yet, they are never recorded as scanned
+    store = StateStore() if cli.get_arg("incremental") and not cli.get_arg("staged") else None
+    cache = None if cli.get_arg("no_llm_cache") else VerdictCache(
+        ttl=cli.get_arg("llm_cache_ttl"),
+        max_entries=cli.get_arg("llm_cache_size"),
+    )
+    detections = None if cli.get_arg("no_detection_cache") else DetectionCache(regex.detection_version())
+    classifier = get_classifier(cli)
+
+    # Run secrets, sensitivity or combined analysis
+    analyse = get_analysis(get_scan_mode(cli))
+    results, metadata = analyse(repo, cli, regex, llm, store, cache, detections, classifier)
 
-    return
+    # Hooks block the commit or push by the exit code
+    if cli.get_arg("exit_code"):
+        sys.exit(get_exit_code(len(results), metadata))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
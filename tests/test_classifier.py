@@ -0,0 +1,33 @@
+import unittest
+
+from src.core.classifier import classify_path, FileClassifier, VENDORED, GENERATED, MINIFIED, LOCK, BINARY, DENIED
+
+class ClassifyPathTest(unittest.TestCase):
+    def test_vendored_dirs_in_any_case(self):
+        for path in ("vendor/lib/a.py", "Vendor/lib/a.py", "ThirdParty/x.js", "ios/Pods/Foo/Foo.m",
+                     "web/NODE_MODULES/left-pad/index.js"):
+            self.assertEqual(classify_path(path), VENDORED, path)
+
+    def test_generated_dirs_in_any_case(self):
+        self.assertEqual(classify_path("web/Dist/app.js"), GENERATED)
+        self.assertEqual(classify_path("api/service_pb2.py"), GENERATED)
+
+    def test_file_names(self):
+        self.assertEqual(classify_path("Cargo.lock"), LOCK)
+        self.assertEqual(classify_path("static/Logo.PNG"), BINARY)
+        self.assertEqual(classify_path("static/App.Min.js"), MINIFIED)
+
+    def test_regular_source(self):
+        for path in ("src/vendors.py", "src/Distance/calc.py", "settings.py"):
+            self.assertIsNone(classify_path(path), path)
+
+class FileClassifierTest(unittest.TestCase):
+    def test_allow_and_deny_globs(self):
+        classifier = FileClassifier(allow=["Vendor/keep/*"], deny=["*.env.example"])
+
+        self.assertIsNone(classifier.category({"file": "Vendor/keep/config.py", "patch": b"+a = 1\n"}))
+        self.assertEqual(classifier.category({"file": "Vendor/lib/a.py", "patch": b"+a = 1\n"}), VENDORED)
+        self.assertEqual(classifier.category({"file": "app/.env.example", "patch": b"+a = 1\n"}), DENIED)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+from src.helpers.pii_helper import validate_card, validate_email, validate_iban, validate_phone, validate_ssn, \
+    ACCEPT, REJECT, ESCALATE
+
+class EmailValidatorTest(unittest.TestCase):
+    def test_real_addresses_are_accepted(self):
+        self.assertEqual(validate_email("jane.smith@bigbank.com", "owner = jane.smith@bigbank.com", "app.py"), ACCEPT)
+
+    def test_placeholder_local_parts_are_rejected(self):
+        for value in ("test@acme-corp.io", "john.doe@bigbank.com", "User@bigbank.com"):
+            self.assertEqual(validate_email(value, "", "app.py"), REJECT, value)
+
+    def test_placeholder_words_inside_addresses_are_not_rejected(self):
+        for value in ("contest@acme-corp.io", "jane.testa@bigbank.com", "samplesmith@bigbank.com"):
+            self.assertEqual(validate_email(value, "", "app.py"), ESCALATE, value)
+
+    def test_invalid_addresses_are_rejected(self):
+        for value in ("icon@2x.png", "git@github.local", "ops@example.com", "jane@corp.123"):
+            self.assertEqual(validate_email(value, "", "app.py"), REJECT, value)
+
+    def test_role_addresses_are_escalated(self):
+        self.assertEqual(validate_email("support@bigbank.com", "", "app.py"), ESCALATE)
+
+class NumberValidatorsTest(unittest.TestCase):
+    def test_cards(self):
+        self.assertEqual(validate_card("4539 1488 0343 6467", "card: 4539 1488 0343 6467", "app.py"), ACCEPT)
+        self.assertEqual(validate_card("4111111111111111", "card", "app.py"), REJECT)
+        self.assertEqual(validate_card("4539148803436468", "card", "app.py"), REJECT)
+
+    def test_ibans(self):
+        self.assertEqual(validate_iban("DE75512108001245126199", "", "app.py"), ACCEPT)
+        self.assertEqual(validate_iban("DE89370400440532013000", "", "app.py"), REJECT)
+        self.assertEqual(validate_iban("DE75512108001245126198", "", "app.py"), REJECT)
+
+    def test_ssns(self):
+        self.assertEqual(validate_ssn("536-22-8726", "ssn: 536-22-8726", "app.py"), ACCEPT)
+        self.assertEqual(validate_ssn("666-22-8726", "ssn: 666-22-8726", "app.py"), REJECT)
+
+    def test_phones(self):
+        self.assertEqual(validate_phone("(415) 829-3746", "phone: (415) 829-3746", "app.py"), ACCEPT)
+        self.assertEqual(validate_phone("(415) 555-0123", "phone: (415) 555-0123", "app.py"), REJECT)
+        self.assertEqual(validate_phone("4158293746", "id = 4158293746", "app.py"), REJECT)
+
+if __name__ == "__main__":
+    unittest.main()